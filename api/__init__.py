@@ -0,0 +1,3 @@
+"""
+Empty __init__ for api package.
+"""
@@ -0,0 +1,47 @@
+"""
+Client for api/server.py. The Streamlit app uses it instead of running the
+pipeline in-process when API_URL is set.
+"""
+import json
+import urllib.error
+import urllib.request
+
+import config
+from pipeline import PipelineResult
+
+
+class ApiError(RuntimeError):
+    """The API answered with an error status or could not be reached."""
+
+
+def _request(path: str, payload: dict | None = None, timeout: float | None = None) -> dict:
+    request = urllib.request.Request(
+        config.API_URL.rstrip("/") + path,
+        data=json.dumps(payload).encode("utf-8") if payload is not None else None,
+        headers={"Content-Type": "application/json"},
+        method="POST" if payload is not None else "GET",
+    )
+    # Leave the server time to send its own 504 before giving up locally.
+    timeout = timeout or config.API_REQUEST_TIMEOUT_SECONDS + 5
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            return json.loads(response.read())
+    except urllib.error.HTTPError as exc:
+        try:
+            message = json.loads(exc.read()).get("error", exc.reason)
+        except ValueError:
+            message = exc.reason
+        raise ApiError(f"{path} returned HTTP {exc.code}: {message}") from exc
+    except (urllib.error.URLError, OSError) as exc:
+        raise ApiError(f"Could not reach the API at {config.API_URL}: {exc}") from exc
+
+
+def ask(query: str) -> PipelineResult:
+    return PipelineResult.from_dict(_request("/ask", {"query": query}))
+
+
+def ready() -> bool:
+    try:
+        return bool(_request("/readyz", timeout=2).get("ready"))
+    except ApiError:
+        return False
@@ -0,0 +1,312 @@
+"""
+HTTP JSON API over the query pipeline, served by pre-forked worker
+processes that share one listening socket. Each worker loads its own
+embedding model and knowledge index in the background after the fork.
+
+    POST /ask       {"query": ...}            routed answer with data, timings and response
+    POST /route     {"query": ...}            {"intent": "sql" | "rag"}
+    POST /retrieve  {"query": ..., "k": 3}    knowledge snippets only
+    POST /sql       {"query": ...}            generated SQL and its result only
+    GET  /healthz                             liveness: the worker is serving
+    GET  /readyz                              readiness: the knowledge index is loaded
+    GET  /metrics                             Prometheus metrics of the answering worker
+
+SIGHUP makes every worker reload the knowledge index, so a cache entry
+written by scripts/build_index.py after an edit to the knowledge base is
+picked up without a restart.
+
+Run from the project root:
+    python api/server.py [--host 0.0.0.0] [--port 8000] [--workers 4]
+"""
+import argparse
+import json
+import os
+import signal
+import socket
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeout
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import config
+import pipeline
+import telemetry
+from llm.rate_limiter import RateLimitExceeded
+from rag.retriever import get_retriever, warm_up
+from tools.router import route
+from tools.sql_tool import pick_sql_query, run_sql
+
+_MAX_K = 20
+
+
+class _BadRequest(ValueError):
+    pass
+
+
+def _query_of(payload: dict) -> str:
+    query = payload.get("query")
+    if not isinstance(query, str) or not query.strip():
+        raise _BadRequest('Body must be a JSON object with a non-empty "query" string.')
+    return query.strip()
+
+
+def _ask(payload: dict) -> dict:
+    result = pipeline.answer(_query_of(payload))
+    return result.to_dict(include_prompt=bool(payload.get("include_prompt")))
+
+
+def _route(payload: dict) -> dict:
+    query = _query_of(payload)
+    return {"query": query, "intent": route(query)}
+
+
+def _retrieve(payload: dict) -> dict:
+    query = _query_of(payload)
+    try:
+        k = int(payload.get("k") or config.RAG_TOP_K)
+    except (TypeError, ValueError):
+        raise _BadRequest('"k" must be an integer.')
+    k = max(1, min(k, _MAX_K))
+    return {"query": query, "k": k, "snippets": get_retriever().retrieve_snippets(query, k)}
+
+
+def _sql(payload: dict) -> dict:
+    query = _query_of(payload)
+    sql_query = pick_sql_query(query)
+    return {"query": query, "sql_query": sql_query, "sql_result": run_sql(sql_query).to_dict()}
+
+
+_ROUTES = {"/ask": _ask, "/route": _route, "/retrieve": _retrieve, "/sql": _sql}
+
+# Request work runs here so a slow request can be answered with a 504 at
+# its deadline; the connection threads only parse and write.
+_executor: ThreadPoolExecutor | None = None
+
+
+def _readiness() -> tuple[int, dict]:
+    retriever = get_retriever()
+    if retriever.ready:
+        return 200, {"ready": True, "pid": os.getpid()}
+    try:
+        retriever.wait(timeout=0)
+    except TimeoutError:
+        return 503, {"ready": False, "pid": os.getpid(), "reason": "knowledge index warming up"}
+    except RuntimeError as exc:
+        return 503, {"ready": False, "pid": os.getpid(), "reason": f"{exc} {exc.__cause__ or ''}".strip()}
+    return 200, {"ready": True, "pid": os.getpid()}
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server_version = "TelecomCopilotAPI/1.0"
+    protocol_version = "HTTP/1.1"
+    # Socket timeout for clients that stall while sending or reading.
+    timeout = config.API_READ_TIMEOUT_SECONDS
+
+    def do_GET(self):
+        path = self.path.split("?", 1)[0]
+        if path == "/healthz":
+            self._send(200, {"status": "ok", "pid": os.getpid()})
+        elif path == "/readyz":
+            self._send(*_readiness())
+        elif path == "/metrics":
+            # Counters are per process; the pid header tells workers apart.
+            self._send_body(
+                200, telemetry.render_metrics().encode("utf-8"),
+                "text/plain; version=0.0.4; charset=utf-8", {"X-Worker-Pid": str(os.getpid())},
+            )
+        elif path in _ROUTES:
+            self._send(405, {"error": f"Use POST for {path}."})
+        else:
+            self._send(404, {"error": f"No such endpoint: {path}"})
+
+    def do_POST(self):
+        path = self.path.split("?", 1)[0]
+        handler = _ROUTES.get(path)
+        if handler is None:
+            self._send(404, {"error": f"No such endpoint: {path}"})
+            return
+
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+        except ValueError:
+            length = -1
+        if length < 0:
+            self.close_connection = True
+            self._send(400, {"error": "Content-Length must be a non-negative integer."})
+            return
+        if length > config.API_MAX_BODY_BYTES:
+            self.close_connection = True
+            self._send(413, {"error": f"Body must be at most {config.API_MAX_BODY_BYTES} bytes."})
+            return
+        try:
+            payload = json.loads(self.rfile.read(length) or b"{}")
+            if not isinstance(payload, dict):
+                raise _BadRequest("Body must be a JSON object.")
+            _query_of(payload)
+        except (ValueError, UnicodeDecodeError) as exc:
+            self._send(400, {"error": str(exc)})
+            return
+
+        future = _executor.submit(handler, payload)
+        try:
+            self._send(200, future.result(timeout=config.API_REQUEST_TIMEOUT_SECONDS))
+        except FutureTimeout:
+            # The work can't be interrupted mid-call; it finishes in the
+            # background and its result is dropped.
+            future.cancel()
+            self._send(504, {"error": f"Request exceeded {config.API_REQUEST_TIMEOUT_SECONDS:g}s."})
+        except _BadRequest as exc:
+            self._send(400, {"error": str(exc)})
+        except RateLimitExceeded as exc:
+            self._send(429, {"error": str(exc)}, {"Retry-After": "10"})
+        except Exception as exc:
+            self._send(500, {"error": f"{type(exc).__name__}: {exc}"})
+
+    def _send(self, status: int, payload: dict, headers: dict | None = None) -> None:
+        body = json.dumps(payload, ensure_ascii=False, default=str).encode("utf-8")
+        self._send_body(status, body, "application/json; charset=utf-8", headers)
+
+    def _send_body(self, status: int, body: bytes, content_type: str, headers: dict | None = None) -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_request(self, code="-", size="-"):
+        telemetry.event("http_request", method=self.command, path=self.path, status=code, pid=os.getpid())
+
+    def log_message(self, format, *args):
+        pass
+
+
+def _warm_worker() -> None:
+    """Load the index, then the intent classifier, without blocking the server."""
+    retriever = warm_up()
+
+    def load_classifier():
+        try:
+            retriever.wait()
+            from tools.intent_classifier import get_classifier
+            get_classifier()
+        except Exception:
+            pass  # readiness reports the index error; routing falls back on its own
+
+    threading.Thread(target=load_classifier, name="warm-classifier", daemon=True).start()
+
+
+def _reload_index() -> None:
+    start = time.perf_counter()
+    try:
+        get_retriever().reload()
+    except Exception as exc:
+        # The previous index keeps serving.
+        telemetry.event("index_reload", pid=os.getpid(), error=f"{type(exc).__name__}: {exc}")
+        return
+    telemetry.event("index_reload", pid=os.getpid(), seconds=round(time.perf_counter() - start, 3))
+
+
+def _run_worker(sock: socket.socket, forked: bool = True) -> None:
+    global _executor
+    _executor = ThreadPoolExecutor(max_workers=config.API_THREADS, thread_name_prefix="api")
+
+    server = ThreadingHTTPServer(sock.getsockname()[:2], _Handler, bind_and_activate=False)
+    server.socket.close()
+    server.socket = sock
+    server.daemon_threads = True
+
+    # SIGTERM stops accepting and returns; under a parent, Ctrl+C reaches
+    # every process in the group, so only the parent acts on SIGINT.
+    signal.signal(signal.SIGTERM, lambda *_: threading.Thread(target=server.shutdown, daemon=True).start())
+    if forked:
+        signal.signal(signal.SIGINT, signal.SIG_IGN)
+    if hasattr(signal, "SIGHUP"):
+        signal.signal(signal.SIGHUP, lambda *_: threading.Thread(target=_reload_index, daemon=True).start())
+
+    _warm_worker()
+    try:
+        server.serve_forever()
+    finally:
+        _executor.shutdown(wait=False, cancel_futures=True)
+
+
+def serve(host: str, port: int, workers: int) -> None:
+    sock = socket.create_server((host, port), backlog=config.API_BACKLOG)
+    # Every worker polls the shared socket; non-blocking accepts let the ones
+    # that lose the race go back to waiting instead of blocking in accept().
+    sock.setblocking(False)
+    print(f"Serving on http://{host}:{port} with {workers} worker(s)")
+
+    if workers <= 1 or not hasattr(os, "fork"):
+        try:
+            _run_worker(sock, forked=False)
+        except KeyboardInterrupt:
+            pass
+        return
+
+    children: set[int] = set()
+    stopping = False
+
+    def spawn() -> None:
+        pid = os.fork()
+        if pid == 0:
+            code = 0
+            try:
+                _run_worker(sock)
+            except BaseException:
+                code = 1
+            finally:
+                os._exit(code)
+        children.add(pid)
+
+    def stop(*_):
+        nonlocal stopping
+        stopping = True
+        for pid in children:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    def reload(*_):
+        for pid in children:
+            try:
+                os.kill(pid, signal.SIGHUP)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    signal.signal(signal.SIGHUP, reload)
+    for _ in range(workers):
+        spawn()
+
+    while children:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        children.discard(pid)
+        if not stopping:
+            print(f"Worker {pid} exited (status {status}); starting a replacement")
+            time.sleep(1)  # don't spin if workers die at start-up
+            spawn()
+    sock.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the copilot as an HTTP JSON API.")
+    parser.add_argument("--host", default=config.API_HOST)
+    parser.add_argument("--port", type=int, default=config.API_PORT)
+    parser.add_argument("--workers", type=int, default=config.API_WORKERS)
+    args = parser.parse_args()
+    serve(args.host, args.port, args.workers)
+
+
+if __name__ == "__main__":
+    main()
@@ -3,14 +3,13 @@ import os
 
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-import io
-import pandas as pd
 import streamlit as st
-from tools.router import route
-from tools.sql_tool import run_sql, pick_sql_query
-from rag.retriever import retrieve
-from llm.prompt_template import build_prompt
-from llm.gemini_client import generate
+import config
+from pipeline import prepare
+from rag.retriever import warm_up
+from llm.gemini_client import generate_stream_cached
+from llm.response_cache import get_cache
+import telemetry
 
 st.set_page_config(
     page_title="Telecom Copilot",
@@ -18,6 +17,16 @@ st.set_page_config(
     layout="centered",
 )
 
+if config.API_URL:
+    # Thin client: the API workers hold the models and run the pipeline.
+    from api import client as api_client
+    _retriever = None
+else:
+    # Load the knowledge index in the background; only RAG queries wait for it.
+    _retriever = warm_up()
+    # No-op unless TELEMETRY_ENABLED; starts once per process.
+    telemetry.serve_metrics()
+
 if "query_history" not in st.session_state:
     st.session_state.query_history = []
 
@@ -32,9 +41,28 @@ with st.sidebar:
     else:
         st.caption("No queries yet.")
     st.divider()
+    if _retriever is None:
+        state = "ready" if api_client.ready() else "not ready"
+        st.caption(f"\U0001f310 Using the API at {config.API_URL} ({state}).")
+    elif not _retriever.ready:
+        st.caption("\u23f3 Knowledge index warming up \u2014 SQL queries are available now.")
+    if _retriever is not None:
+        with st.expander("\U0001f4be Response Cache"):
+            stats = get_cache().stats()
+            st.caption(
+                f"Entries: {stats['entries']} \u00b7 Exact hits: {stats['exact_hits']} \u00b7 "
+                f"Near-duplicate hits: {stats['semantic_hits']} \u00b7 Misses: {stats['misses']} \u00b7 "
+                f"Hit rate: {stats['hit_rate']:.0%}"
+            )
+            if _retriever.ready:
+                retrieval = _retriever.cache_stats()
+                st.caption(
+                    f"Query embeddings: {retrieval['embeddings']['hit_rate']:.0%} hit rate \u00b7 "
+                    f"Retrieval results: {retrieval['results']['hit_rate']:.0%} hit rate"
+                )
     with st.expander("\u2139\ufe0f System Architecture"):
         st.markdown(
-            "**Routing:** Rule-based (keyword match) \u2192 LLM fallback  \n"
+            "**Routing:** Rule-based (keyword match) \u2192 local classifier \u2192 LLM fallback  \n"
             "**SQL path:** NL \u2192 SQL \u2192 SQLite (no RAG bleed)  \n"
             "**RAG path:** Query \u2192 FAISS top-3 \u2192 Gemini  \n"
             "**Grounding:** Only values in retrieved context cited  \n\n"
@@ -62,36 +90,46 @@ if generate_btn:
         st.warning("Please enter a question before generating an insight.")
     else:
         with st.status("Processing query...", expanded=True) as status:
-            st.write("\U0001f500 Routing query...")
-            intent = route(user_query)
-
-            sql_result = ""
-            sql_query = ""
-            sql_df = None
-            context = ""
-            raw_docs = ""
-            docs_count = 0
-
-            if intent == "sql":
-                st.write("\U0001f5c4\ufe0f Executing SQL query...")
-                sql_query = pick_sql_query(user_query)
-                sql_result = run_sql(sql_query)
+            def _report(stage):
+                if stage == "route":
+                    st.write("\U0001f500 Routing query...")
+                elif stage == "sql":
+                    st.write("\U0001f5c4\ufe0f Executing SQL query...")
+                elif stage == "retrieve":
+                    if not _retriever.ready:
+                        st.write("\u23f3 Waiting for knowledge index to finish loading...")
+                    st.write("\U0001f50d Retrieving knowledge documents...")
+                elif stage == "build_prompt":
+                    st.write("\u2728 Building grounded prompt...")
+
+            if _retriever is None:
+                st.write("\U0001f310 Sending query to the API...")
                 try:
-                    sql_df = pd.read_csv(
-                        io.StringIO(sql_result), sep=r"\s{2,}", engine="python"
-                    )
-                except Exception:
-                    sql_df = None
+                    result = api_client.ask(user_query)
+                except api_client.ApiError as exc:
+                    status.update(label="API request failed.", state="error")
+                    st.error(str(exc))
+                    st.stop()
             else:
-                st.write("\U0001f50d Retrieving knowledge documents...")
-                context = retrieve(user_query)
-                raw_docs = context
-                docs_count = context.count("---") + 1 if context else 0
-
-            st.write("\u2728 Generating structured insight...")
-            prompt = build_prompt(query=user_query, context=context, sql_result=sql_result)
-            response = generate(prompt)
-            status.update(label="Analysis complete.", state="complete", expanded=False)
+                result = prepare(user_query, on_stage=_report)
+            intent = result.intent
+            sql_query = result.sql_query
+            sql_rows = result.sql_result
+            sql_result = result.sql_text
+            sql_df = sql_rows.to_frame() if sql_rows and sql_rows.rows else None
+            context = result.context
+            raw_docs = context
+            docs_count = len(result.snippets)
+            built = result.prompt
+            prompt = built.text
+
+            st.write(f"\U0001f9ee Prompt \u2248 {built.estimated_tokens} tokens")
+            if built.snippets_dropped or built.sql_summarized:
+                st.write(
+                    f"\u2702\ufe0f Trimmed to budget: dropped {built.snippets_dropped} snippet(s)"
+                    + ("; SQL result summarized" if built.sql_summarized else "")
+                )
+            status.update(label="Context ready \u2014 generating insight.", state="complete", expanded=False)
 
         if user_query not in st.session_state.query_history:
             st.session_state.query_history.append(user_query)
@@ -126,7 +164,7 @@ if generate_btn:
         )
 
         if intent == "sql":
-            row_count = max(len(sql_result.strip().splitlines()) - 1, 0) if sql_result else 0
+            row_count = sql_rows.row_count if sql_rows else 0
             col1, col2, col3 = st.columns(3)
             col1.metric("Query Type", "SQL")
             col2.metric("Rows Returned", row_count)
@@ -150,7 +188,16 @@ if generate_btn:
             'INSIGHT REPORT</p><hr style="margin-top:0;">',
             unsafe_allow_html=True,
         )
-        st.markdown(response)
+        if _retriever is None:
+            # The API returns the finished report rather than a stream.
+            response = result.response
+            st.markdown(response)
+        else:
+            response = st.write_stream(
+                generate_stream_cached(
+                    prompt, query=user_query, context=context, sql_result=sql_result
+                )
+            )
 
         with st.expander("\U0001f4cb Copy Raw Insight", expanded=False):
             st.code(response, language=None)
@@ -169,7 +216,15 @@ if generate_btn:
                 st.code(sql_query, language="sql")
                 if sql_df is not None and not sql_df.empty:
                     total = len(sql_df)
-                    st.markdown(f"**Result** \u2014 showing {min(5, total)} of {total} rows")
+                    st.markdown(
+                        f"**Result** \u2014 showing {min(5, total)} of {sql_rows.row_count} rows "
+                        f"\u00b7 {sql_rows.elapsed_ms:.1f} ms"
+                    )
+                    if sql_rows.truncated:
+                        st.caption(
+                            f"Result capped at {sql_rows.row_count} rows "
+                            f"(SQL_MAX_ROWS / SQL_MAX_BYTES) for the insight prompt {sql_rows.truncation_note}."
+                        )
                     col_cfg = {}
                     for col in sql_df.columns:
                         if col == "churn_probability":
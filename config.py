@@ -6,15 +6,114 @@ load_dotenv()
 
 GEMINI_API_KEY: str = os.getenv("GEMINI_API_KEY", "")
 GEMINI_MODEL: str = "gemini-2.5-flash"
+# Shared limiter for all Gemini calls (defaults match the free tier of Flash).
+GEMINI_REQUESTS_PER_MINUTE: float = float(os.getenv("GEMINI_REQUESTS_PER_MINUTE", "10"))
+GEMINI_TOKENS_PER_MINUTE: float = float(os.getenv("GEMINI_TOKENS_PER_MINUTE", "250000"))
+GEMINI_EXPECTED_OUTPUT_TOKENS: int = int(os.getenv("GEMINI_EXPECTED_OUTPUT_TOKENS", "800"))
+# Give up (and surface the 429) rather than wait past these deadlines.
+GEMINI_DEADLINE_SECONDS: float = float(os.getenv("GEMINI_DEADLINE_SECONDS", "45"))
+ROUTER_DEADLINE_SECONDS: float = float(os.getenv("ROUTER_DEADLINE_SECONDS", "8"))
+GEMINI_BACKOFF_BASE_SECONDS: float = float(os.getenv("GEMINI_BACKOFF_BASE_SECONDS", "1"))
+GEMINI_BACKOFF_MAX_SECONDS: float = float(os.getenv("GEMINI_BACKOFF_MAX_SECONDS", "20"))
+GEMINI_MAX_CONNECTIONS: int = int(os.getenv("GEMINI_MAX_CONNECTIONS", "10"))
+GEMINI_KEEPALIVE_SECONDS: float = float(os.getenv("GEMINI_KEEPALIVE_SECONDS", "60"))
 
 EMBEDDING_MODEL: str = "sentence-transformers/all-MiniLM-L6-v2"
 RAG_TOP_K: int = 3
+QUERY_EMBEDDING_CACHE_SIZE: int = int(os.getenv("QUERY_EMBEDDING_CACHE_SIZE", "1024"))
+RETRIEVAL_CACHE_SIZE: int = int(os.getenv("RETRIEVAL_CACHE_SIZE", "1024"))
+# Upper bound on the estimated size of the prompt sent to Gemini.
+PROMPT_TOKEN_BUDGET: int = int(os.getenv("PROMPT_TOKEN_BUDGET", "4000"))
 
-KNOWLEDGE_PATH: str = os.path.join(os.path.dirname(__file__), "data", "telecom_knowledge.json")
+# When the keyword rules can't route a query, run the SQL and RAG paths
+# while it is being classified and keep whichever branch wins.
+SPECULATIVE_EXECUTION: bool = os.getenv("SPECULATIVE_EXECUTION", "1") != "0"
+SPECULATIVE_WORKERS: int = int(os.getenv("SPECULATIVE_WORKERS", "8"))
+
+INTENT_EXAMPLES_PATH: str = os.path.join(os.path.dirname(__file__), "data", "intent_examples.json")
+# Below this centroid-similarity margin the local classifier defers to Gemini.
+INTENT_CONFIDENCE_MARGIN: float = float(os.getenv("INTENT_CONFIDENCE_MARGIN", "0.05"))
+
+# A .json array, a .jsonl file or a directory of .json/.jsonl/.md/.txt files.
+KNOWLEDGE_PATH: str = os.getenv(
+    "KNOWLEDGE_PATH", os.path.join(os.path.dirname(__file__), "data", "telecom_knowledge.json")
+)
+# Long entries are split into overlapping chunks (sizes in characters).
+CHUNK_SIZE: int = int(os.getenv("CHUNK_SIZE", "1200"))
+CHUNK_OVERLAP: int = int(os.getenv("CHUNK_OVERLAP", "200"))
+INGEST_BATCH_DOCS: int = int(os.getenv("INGEST_BATCH_DOCS", "2048"))
+EMBED_BATCH_SIZE: int = int(os.getenv("EMBED_BATCH_SIZE", "256"))
+# fastembed data-parallel workers for large batches (0 = all cores, unset = off).
+EMBED_PARALLEL: int | None = int(os.environ["EMBED_PARALLEL"]) if os.getenv("EMBED_PARALLEL") else None
 DB_PATH: str = os.path.join(os.path.dirname(__file__), "data", "subscriber_sample.db")
+SQL_POOL_SIZE: int = int(os.getenv("SQL_POOL_SIZE", "8"))
+SQLITE_MMAP_SIZE: int = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+SQLITE_CACHE_SIZE_KB: int = int(os.getenv("SQLITE_CACHE_SIZE_KB", str(64 * 1024)))
+# Hard caps on what a single query may return into memory and the prompt.
+SQL_MAX_ROWS: int = int(os.getenv("SQL_MAX_ROWS", "200"))
+SQL_MAX_BYTES: int = int(os.getenv("SQL_MAX_BYTES", str(64 * 1024)))
+SQL_FETCH_SIZE: int = int(os.getenv("SQL_FETCH_SIZE", "1000"))
+SQL_CACHE_ENABLED: bool = os.getenv("SQL_CACHE_ENABLED", "1") != "0"
+SQL_CACHE_MAX_ENTRIES: int = int(os.getenv("SQL_CACHE_MAX_ENTRIES", "256"))
+# Vector index: "flat" (exact), "hnsw", "ivf" or "ivfpq". IVF variants are
+# trained automatically and fall back to flat when the corpus is too small.
+FAISS_INDEX_TYPE: str = os.getenv("FAISS_INDEX_TYPE", "flat")
+FAISS_HNSW_M: int = int(os.getenv("FAISS_HNSW_M", "32"))
+FAISS_HNSW_EF_SEARCH: int = int(os.getenv("FAISS_HNSW_EF_SEARCH", "64"))
+FAISS_IVF_NLIST: int = int(os.getenv("FAISS_IVF_NLIST", "0"))  # 0 = 4 * sqrt(n)
+FAISS_IVF_NPROBE: int = int(os.getenv("FAISS_IVF_NPROBE", "16"))
+FAISS_PQ_M: int = int(os.getenv("FAISS_PQ_M", "48"))
+FAISS_PQ_NBITS: int = int(os.getenv("FAISS_PQ_NBITS", "8"))
+# Stored vector encoding: "none" keeps float32 (1.5 KB per 384-d chunk),
+# "sq8" one int8 code per dimension (4x smaller). FAISS_PCA_DIM > 0 first
+# projects vectors onto that many principal components.
+FAISS_QUANTIZATION: str = os.getenv("FAISS_QUANTIZATION", "none")
+FAISS_PCA_DIM: int = int(os.getenv("FAISS_PCA_DIM", "0"))
+# Open the cached FAISS index memory-mapped, so pre-forked API workers share
+# one copy of it through the page cache (the docstore is always mapped).
+FAISS_MMAP: bool = os.getenv("FAISS_MMAP", "1") != "0"
+INDEX_CACHE_DIR: str = os.getenv(
+    "INDEX_CACHE_DIR", os.path.join(os.path.dirname(__file__), "data", "index_cache")
+)
+
+RESPONSE_CACHE_ENABLED: bool = os.getenv("RESPONSE_CACHE_ENABLED", "1") != "0"
+RESPONSE_CACHE_PATH: str = os.getenv(
+    "RESPONSE_CACHE_PATH", os.path.join(os.path.dirname(__file__), "data", "response_cache.db")
+)
+RESPONSE_CACHE_TTL_SECONDS: int = int(os.getenv("RESPONSE_CACHE_TTL_SECONDS", str(24 * 3600)))
+RESPONSE_CACHE_MAX_ENTRIES: int = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "500"))
+# Minimum cosine similarity between query embeddings for a near-duplicate hit.
+RESPONSE_CACHE_SIMILARITY: float = float(os.getenv("RESPONSE_CACHE_SIMILARITY", "0.90"))
+
+# Spans/counters as JSON log lines (TELEMETRY_LOG_PATH, empty = stderr) and
+# a Prometheus /metrics endpoint on METRICS_HOST:METRICS_PORT (0 = off).
+TELEMETRY_ENABLED: bool = os.getenv("TELEMETRY_ENABLED", "0") == "1"
+TELEMETRY_LOG_PATH: str = os.getenv("TELEMETRY_LOG_PATH", "")
+METRICS_HOST: str = os.getenv("METRICS_HOST", "127.0.0.1")
+METRICS_PORT: int = int(os.getenv("METRICS_PORT", "9464"))
+METRICS_PREFIX: str = "insight_"
+
+# HTTP API (api/server.py): pre-forked worker processes, each running up to
+# API_THREADS requests at once. API_URL makes the Streamlit app a thin client.
+API_HOST: str = os.getenv("API_HOST", "127.0.0.1")
+API_PORT: int = int(os.getenv("API_PORT", "8000"))
+API_WORKERS: int = int(os.getenv("API_WORKERS", "2"))
+API_THREADS: int = int(os.getenv("API_THREADS", "8"))
+API_BACKLOG: int = int(os.getenv("API_BACKLOG", "128"))
+API_REQUEST_TIMEOUT_SECONDS: float = float(os.getenv("API_REQUEST_TIMEOUT_SECONDS", "60"))
+API_READ_TIMEOUT_SECONDS: float = float(os.getenv("API_READ_TIMEOUT_SECONDS", "15"))
+API_MAX_BODY_BYTES: int = int(os.getenv("API_MAX_BODY_BYTES", str(64 * 1024)))
+API_URL: str = os.getenv("API_URL", "")
+
+# Cold-start budget (milliseconds of module import time) checked by
+# scripts/profile_imports.py.
+IMPORT_BUDGET_MS: float = float(os.getenv("IMPORT_BUDGET_MS", "150"))
 
-if not GEMINI_API_KEY:
-    raise EnvironmentError(
-        "GEMINI_API_KEY is not set. Add it to your .env file."
-    )
 
+def require_api_key() -> str:
+    """The Gemini API key; checked when a client is created, not at import."""
+    if not GEMINI_API_KEY:
+        raise EnvironmentError(
+            "GEMINI_API_KEY is not set. Add it to your .env file."
+        )
+    return GEMINI_API_KEY
@@ -0,0 +1,36 @@
+import threading
+
+import config
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client():
+    """
+    Process-wide google-genai client shared by the router and the generator.
+    Its sync and async httpx transports keep connections alive and pool them,
+    so repeated calls (and concurrent asyncio calls via client.aio) reuse TLS
+    sessions instead of opening a new connection per request.
+    """
+    global _client
+    with _client_lock:
+        if _client is None:
+            api_key = config.require_api_key()
+            import httpx
+            from google import genai
+            from google.genai import types
+
+            limits = httpx.Limits(
+                max_connections=config.GEMINI_MAX_CONNECTIONS,
+                max_keepalive_connections=config.GEMINI_MAX_CONNECTIONS,
+                keepalive_expiry=config.GEMINI_KEEPALIVE_SECONDS,
+            )
+            _client = genai.Client(
+                api_key=api_key,
+                http_options=types.HttpOptions(
+                    client_args={"limits": limits},
+                    async_client_args={"limits": limits},
+                ),
+            )
+    return _client
@@ -1,26 +1,135 @@
-import time
-from google import genai
-from google.genai import errors as genai_errors
+import sqlite3
+from typing import Iterator
+
+from llm import response_cache
+from llm.client import get_client
+from llm.prompt_template import estimate_tokens
+from llm.rate_limiter import Retry
 import config
+import telemetry
 
-_client = genai.Client(api_key=config.GEMINI_API_KEY)
 
-_RETRY_DELAYS = (10, 30, 60)
+def _call_tokens(prompt: str) -> int:
+    return estimate_tokens(prompt) + config.GEMINI_EXPECTED_OUTPUT_TOKENS
 
 
+@telemetry.traced("generate")
 def generate(prompt: str) -> str:
-    last_exc = None
-    for attempt, delay in enumerate((*_RETRY_DELAYS, None), start=1):
+    from google.genai import errors as genai_errors
+
+    retry = Retry(_call_tokens(prompt))
+    while True:
+        retry.acquire()
         try:
-            response = _client.models.generate_content(
+            response = get_client().models.generate_content(
                 model=config.GEMINI_MODEL,
                 contents=prompt,
             )
+            retry.succeeded()
             return response.text
         except genai_errors.ClientError as exc:
-            if exc.status_code == 429 and delay is not None:
-                last_exc = exc
-                time.sleep(delay)
-                continue
-            raise
-    raise last_exc
+            if not retry.should_retry(exc):
+                raise
+            retry.sleep()
+
+
+@telemetry.traced("generate")
+async def generate_async(prompt: str) -> str:
+    from google.genai import errors as genai_errors
+
+    retry = Retry(_call_tokens(prompt))
+    while True:
+        await retry.acquire_async()
+        try:
+            response = await get_client().aio.models.generate_content(
+                model=config.GEMINI_MODEL,
+                contents=prompt,
+            )
+            retry.succeeded()
+            return response.text
+        except genai_errors.ClientError as exc:
+            if not retry.should_retry(exc):
+                raise
+            await retry.sleep_async()
+
+
+def generate_stream(prompt: str) -> Iterator[str]:
+    """
+    Yield response text chunks as Gemini produces them. A 429 is retried with
+    the same backoff as generate() as long as nothing has been yielded yet;
+    once output has started, errors propagate to the caller.
+    """
+    from google.genai import errors as genai_errors
+
+    retry = Retry(_call_tokens(prompt))
+    with telemetry.span("generate", stream=True):
+        while True:
+            retry.acquire()
+            started = False
+            try:
+                for chunk in get_client().models.generate_content_stream(
+                    model=config.GEMINI_MODEL,
+                    contents=prompt,
+                ):
+                    if chunk.text:
+                        started = True
+                        yield chunk.text
+                retry.succeeded()
+                return
+            except genai_errors.ClientError as exc:
+                if started or not retry.should_retry(exc):
+                    raise
+                retry.sleep()
+
+
+# A cache that can't be read or written (locked, corrupt, disk full) is
+# treated as a miss: the response is generated, just not stored.
+def _cache_get(prompt: str, query: str, grounding: str) -> str | None:
+    try:
+        cached = response_cache.get_cache().get(prompt, query, grounding)
+    except (sqlite3.Error, OSError):
+        cached = None
+    telemetry.incr("cache_requests_total", cache="response", result="miss" if cached is None else "hit")
+    return cached
+
+
+def _cache_put(prompt: str, query: str, grounding: str, response: str) -> None:
+    try:
+        response_cache.get_cache().put(prompt, query, grounding, response)
+    except (sqlite3.Error, OSError):
+        pass
+
+
+def generate_cached(prompt: str, query: str, context: str = "", sql_result: str = "") -> str:
+    if not config.RESPONSE_CACHE_ENABLED:
+        return generate(prompt)
+
+    grounding = response_cache.grounding_of(context, sql_result)
+    cached = _cache_get(prompt, query, grounding)
+    if cached is not None:
+        return cached
+
+    response = generate(prompt)
+    _cache_put(prompt, query, grounding, response)
+    return response
+
+
+def generate_stream_cached(
+    prompt: str, query: str, context: str = "", sql_result: str = ""
+) -> Iterator[str]:
+    if not config.RESPONSE_CACHE_ENABLED:
+        yield from generate_stream(prompt)
+        return
+
+    grounding = response_cache.grounding_of(context, sql_result)
+    cached = _cache_get(prompt, query, grounding)
+    if cached is not None:
+        yield cached
+        return
+
+    chunks = []
+    for chunk in generate_stream(prompt):
+        chunks.append(chunk)
+        yield chunk
+    # Only complete responses are cached; an abandoned stream never gets here.
+    _cache_put(prompt, query, grounding, "".join(chunks))
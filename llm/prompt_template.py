@@ -1,3 +1,9 @@
+import math
+from dataclasses import dataclass
+
+import config
+import telemetry
+
 SYSTEM_ROLE = "You are a Telecom Commercial Strategy Assistant."
 
 _INSTRUCTIONS = """
@@ -25,10 +31,22 @@ Deviation from this format is unacceptable.
 """
 
 
-def build_prompt(query: str, context: str, sql_result: str = "") -> str:
-    ctx = context or "No relevant documents found."
-    sql = sql_result or ""
+@dataclass(frozen=True)
+class PromptBuild:
+    text: str
+    estimated_tokens: int
+    snippets_used: int
+    snippets_dropped: int
+    sql_summarized: bool
+
+
+def estimate_tokens(text: str) -> int:
+    # ~4 characters per token for English prose and CSV; no tokenizer needed.
+    return math.ceil(len(text) / 4)
 
+
+def _render(query: str, snippets: list[str], sql: str) -> str:
+    ctx = "\n\n---\n\n".join(snippets) or "No relevant documents found."
     sql_section = f"\n### SQL Query Results\n{sql}" if sql else ""
 
     prompt = (
@@ -41,3 +59,64 @@ def build_prompt(query: str, context: str, sql_result: str = "") -> str:
         f"### User Question\n{query}\n"
     )
     return prompt
+
+
+def _summarize_sql(sql_result, top_rows: int) -> str:
+    note = f" {sql_result.truncation_note}" if sql_result.truncated else ""
+    lines = [f"Result too large for the prompt{note}. Column statistics over the {sql_result.row_count} fetched rows:"]
+    lines += [f"- {line}" for line in sql_result.column_summary()]
+    lines.append(f"First {min(top_rows, sql_result.row_count)} rows:")
+    lines.append(sql_result.to_csv(max_rows=top_rows))
+    return "\n".join(lines)
+
+
+@telemetry.traced("build_prompt")
+def assemble_prompt(
+    query: str,
+    context: str | list[str],
+    sql_result="",
+    token_budget: int | None = None,
+) -> PromptBuild:
+    """
+    Build the prompt within a token budget. SQL results (a SqlResult) are
+    encoded as compact CSV; when the prompt is over budget the lowest-ranked
+    knowledge snippets are dropped first, then the SQL result is replaced by
+    column statistics plus as many top rows as fit.
+    """
+    budget = token_budget or config.PROMPT_TOKEN_BUDGET
+    snippets = [context] if isinstance(context, str) else list(context)
+    snippets = [snippet for snippet in snippets if snippet]
+    structured = hasattr(sql_result, "to_csv")
+    sql = sql_result.to_csv() if structured else (sql_result or "")
+    total_snippets = len(snippets)
+    summarized = False
+
+    text = _render(query, snippets, sql)
+    while estimate_tokens(text) > budget and snippets:
+        snippets.pop()
+        text = _render(query, snippets, sql)
+
+    if estimate_tokens(text) > budget and structured and sql_result.rows:
+        summarized = True
+        top_rows = sql_result.row_count
+        while True:
+            top_rows //= 2
+            text = _render(query, snippets, _summarize_sql(sql_result, top_rows))
+            if estimate_tokens(text) <= budget or top_rows == 0:
+                break
+
+    build = PromptBuild(
+        text=text,
+        estimated_tokens=estimate_tokens(text),
+        snippets_used=len(snippets),
+        snippets_dropped=total_snippets - len(snippets),
+        sql_summarized=summarized,
+    )
+    telemetry.observe("prompt_tokens", build.estimated_tokens)
+    if build.snippets_dropped:
+        telemetry.incr("prompt_snippets_dropped_total", build.snippets_dropped)
+    return build
+
+
+def build_prompt(query: str, context: str | list[str], sql_result="") -> str:
+    return assemble_prompt(query, context, sql_result).text
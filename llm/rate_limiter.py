@@ -0,0 +1,190 @@
+import random
+import re
+import threading
+import time
+
+import config
+import telemetry
+
+_DEADLINE_MESSAGE = "Gemini rate limit (429 RESOURCE_EXHAUSTED): no capacity before the deadline."
+
+
+class RateLimitExceeded(RuntimeError):
+    """The call could not be made (or retried) before its deadline."""
+
+
+class RateLimiter:
+    """
+    Process-wide token buckets for Gemini requests/min and tokens/min.
+
+    Every caller reserves capacity before calling the API, so concurrent
+    sessions share one budget instead of each discovering the quota through
+    429s. A 429 halves the refill rate and blocks all callers until the
+    server's retry hint (or the backoff) has passed; each success then
+    restores the rate gradually.
+    """
+
+    def __init__(self, requests_per_minute: float, tokens_per_minute: float):
+        self._rpm = requests_per_minute
+        self._tpm = tokens_per_minute
+        self._requests = float(requests_per_minute)
+        self._tokens = float(tokens_per_minute)
+        self._scale = 1.0
+        self._blocked_until = 0.0
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+        self.throttled = 0
+
+    def _refill(self, now: float) -> None:
+        elapsed = now - self._updated
+        self._updated = now
+        self._requests = min(self._rpm, self._requests + elapsed * self._rpm * self._scale / 60)
+        self._tokens = min(self._tpm, self._tokens + elapsed * self._tpm * self._scale / 60)
+
+    def _reserve(self, tokens: int) -> float:
+        """Take capacity and return 0, or return how long to wait before retrying."""
+        tokens = min(tokens, self._tpm)
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            if now < self._blocked_until:
+                return self._blocked_until - now
+            if self._requests >= 1 and self._tokens >= tokens:
+                self._requests -= 1
+                self._tokens -= tokens
+                return 0.0
+            request_wait = (1 - self._requests) * 60 / (self._rpm * self._scale)
+            token_wait = (tokens - self._tokens) * 60 / (self._tpm * self._scale)
+            return max(request_wait, token_wait, 0.01)
+
+    def acquire(self, tokens: int, deadline: float) -> None:
+        while True:
+            wait = self._reserve(tokens)
+            if not wait:
+                return
+            if time.monotonic() + wait > deadline:
+                telemetry.incr("gemini_deadline_exceeded_total")
+                raise RateLimitExceeded(_DEADLINE_MESSAGE)
+            time.sleep(wait)
+
+    async def acquire_async(self, tokens: int, deadline: float) -> None:
+        import asyncio
+
+        while True:
+            wait = self._reserve(tokens)
+            if not wait:
+                return
+            if time.monotonic() + wait > deadline:
+                telemetry.incr("gemini_deadline_exceeded_total")
+                raise RateLimitExceeded(_DEADLINE_MESSAGE)
+            await asyncio.sleep(wait)
+
+    def record_throttle(self, pause: float) -> None:
+        with self._lock:
+            self.throttled += 1
+            self._scale = max(0.1, self._scale / 2)
+            self._blocked_until = max(self._blocked_until, time.monotonic() + pause)
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._scale = min(1.0, self._scale + 0.1)
+
+
+def _status_code(exc: Exception) -> int | None:
+    return getattr(exc, "code", None) or getattr(exc, "status_code", None)
+
+
+def retry_hint(exc: Exception) -> float | None:
+    """Seconds to wait from a RetryInfo detail or Retry-After header, if any."""
+    details = getattr(exc, "details", None)
+    if isinstance(details, dict):
+        for item in details.get("error", {}).get("details", []) or []:
+            match = re.fullmatch(r"([\d.]+)s", str(item.get("retryDelay", "")))
+            if match:
+                return float(match.group(1))
+    response = getattr(exc, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+class Retry:
+    """
+    Retry state for one logical Gemini call: acquire capacity, and on a 429
+    decide whether another attempt fits before the deadline.
+
+        retry = Retry(tokens)
+        while True:
+            retry.acquire()
+            try:
+                result = call()
+                retry.succeeded()
+                break
+            except ClientError as exc:
+                if not retry.should_retry(exc):
+                    raise
+                retry.sleep()
+    """
+
+    def __init__(self, tokens: int, deadline_seconds: float | None = None):
+        self._tokens = tokens
+        self._deadline = time.monotonic() + (deadline_seconds or config.GEMINI_DEADLINE_SECONDS)
+        self._attempt = 0
+        self._delay = 0.0
+        self._limiter = get_limiter()
+
+    def acquire(self) -> None:
+        self._limiter.acquire(self._tokens, self._deadline)
+
+    async def acquire_async(self) -> None:
+        await self._limiter.acquire_async(self._tokens, self._deadline)
+
+    def succeeded(self) -> None:
+        self._limiter.record_success()
+
+    def should_retry(self, exc: Exception) -> bool:
+        if _status_code(exc) != 429:
+            return False
+        telemetry.incr("gemini_throttled_total")
+        hint = retry_hint(exc)
+        if hint is not None:
+            # Honour the server's hint, spread out a little so sessions
+            # throttled together don't all return at the same instant.
+            delay = hint + random.uniform(0, min(1.0, hint * 0.1))
+        else:
+            cap = min(config.GEMINI_BACKOFF_MAX_SECONDS, config.GEMINI_BACKOFF_BASE_SECONDS * 2 ** self._attempt)
+            delay = random.uniform(0, cap)  # full jitter
+        self._limiter.record_throttle(delay)
+        self._attempt += 1
+        if time.monotonic() + delay > self._deadline:
+            telemetry.incr("gemini_deadline_exceeded_total")
+            return False
+        telemetry.incr("gemini_retries_total")
+        telemetry.event("gemini_retry", attempt=self._attempt, delay_s=round(delay, 3), server_hint=hint is not None)
+        self._delay = delay
+        return True
+
+    def sleep(self) -> None:
+        time.sleep(self._delay)
+
+    async def sleep_async(self) -> None:
+        import asyncio
+
+        await asyncio.sleep(self._delay)
+
+
+_limiter: RateLimiter | None = None
+_limiter_lock = threading.Lock()
+
+
+def get_limiter() -> RateLimiter:
+    global _limiter
+    with _limiter_lock:
+        if _limiter is None:
+            _limiter = RateLimiter(
+                requests_per_minute=config.GEMINI_REQUESTS_PER_MINUTE,
+                tokens_per_minute=config.GEMINI_TOKENS_PER_MINUTE,
+            )
+    return _limiter
@@ -0,0 +1,168 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+
+import config
+
+# Several app/API processes can share one cache file: WAL lets readers run
+# alongside a writer, and writers wait this long for the lock instead of
+# failing at once with "database is locked".
+_BUSY_TIMEOUT_SECONDS = 5.0
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    prompt_hash    TEXT PRIMARY KEY,
+    grounding_hash TEXT NOT NULL,
+    embedding      BLOB,
+    response       TEXT NOT NULL,
+    created_at     REAL NOT NULL,
+    last_used      REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_responses_grounding ON responses (grounding_hash);
+CREATE INDEX IF NOT EXISTS idx_responses_last_used ON responses (last_used);
+"""
+
+
+def _sha256(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def _query_embedding(query: str):
+    # Only reuse the embedding model if the RAG path has already loaded it;
+    # a cache lookup must never pay for loading the ONNX model itself.
+    from rag.vector_store import embed_vector, peek_embeddings
+
+    embeddings = peek_embeddings()
+    if embeddings is None:
+        return None
+    import numpy as np
+
+    vec = embed_vector(embeddings, query.strip().lower())
+    norm = np.linalg.norm(vec)
+    return vec / norm if norm else None
+
+
+class ResponseCache:
+    """
+    On-disk cache of Gemini responses with TTL expiry and LRU eviction.
+
+    An exact hit requires the same prompt hash. A near-duplicate hit requires
+    identical grounding data (SQL result + retrieved context) and a query
+    embedding whose cosine similarity passes the configured threshold.
+    """
+
+    def __init__(self, path: str, ttl_seconds: int, max_entries: int, similarity: float):
+        self._ttl = ttl_seconds
+        self._max_entries = max_entries
+        self._similarity = similarity
+        self._lock = threading.Lock()
+        self.exact_hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=_BUSY_TIMEOUT_SECONDS, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL;")
+        self._conn.executescript(_SCHEMA)
+
+    def get(self, prompt: str, query: str, grounding: str) -> str | None:
+        now = time.time()
+        cutoff = now - self._ttl
+        prompt_hash = _sha256(prompt)
+
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT response FROM responses WHERE prompt_hash = ? AND created_at >= ?;",
+                (prompt_hash, cutoff),
+            ).fetchone()
+            if row:
+                self._touch(prompt_hash, now)
+                self.exact_hits += 1
+                return row[0]
+
+            candidates = self._conn.execute(
+                "SELECT prompt_hash, embedding, response FROM responses "
+                "WHERE grounding_hash = ? AND created_at >= ? AND embedding IS NOT NULL;",
+                (_sha256(grounding), cutoff),
+            ).fetchall()
+
+        if candidates:
+            import numpy as np
+
+            vec = _query_embedding(query)
+            if vec is not None:
+                # Entries written under a different embedding model are skipped.
+                candidates = [c for c in candidates if len(c[1]) == vec.nbytes]
+            if vec is not None and candidates:
+                matrix = np.frombuffer(b"".join(c[1] for c in candidates), dtype=np.float32)
+                scores = matrix.reshape(len(candidates), -1) @ vec
+                best = int(np.argmax(scores))
+                if scores[best] >= self._similarity:
+                    with self._lock:
+                        self._touch(candidates[best][0], now)
+                        self.semantic_hits += 1
+                    return candidates[best][2]
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, prompt: str, query: str, grounding: str, response: str) -> None:
+        now = time.time()
+        vec = _query_embedding(query)
+        blob = vec.tobytes() if vec is not None else None
+
+        # The connection context commits, or rolls back if a statement fails.
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?);",
+                (_sha256(prompt), _sha256(grounding), blob, response, now, now),
+            )
+            self._conn.execute("DELETE FROM responses WHERE created_at < ?;", (now - self._ttl,))
+            self._conn.execute(
+                "DELETE FROM responses WHERE prompt_hash NOT IN "
+                "(SELECT prompt_hash FROM responses ORDER BY last_used DESC LIMIT ?);",
+                (self._max_entries,),
+            )
+
+    def _touch(self, prompt_hash: str, now: float) -> None:
+        with self._conn:
+            self._conn.execute(
+                "UPDATE responses SET last_used = ? WHERE prompt_hash = ?;", (now, prompt_hash)
+            )
+
+    def stats(self) -> dict:
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM responses;").fetchone()[0]
+        lookups = self.exact_hits + self.semantic_hits + self.misses
+        hits = self.exact_hits + self.semantic_hits
+        return {
+            "entries": entries,
+            "exact_hits": self.exact_hits,
+            "semantic_hits": self.semantic_hits,
+            "misses": self.misses,
+            "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+_cache: ResponseCache | None = None
+_cache_lock = threading.Lock()
+
+
+def get_cache() -> ResponseCache:
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = ResponseCache(
+                config.RESPONSE_CACHE_PATH,
+                ttl_seconds=config.RESPONSE_CACHE_TTL_SECONDS,
+                max_entries=config.RESPONSE_CACHE_MAX_ENTRIES,
+                similarity=config.RESPONSE_CACHE_SIMILARITY,
+            )
+    return _cache
+
+
+def grounding_of(context: str, sql_result: str) -> str:
+    return f"{context or ''}\0{sql_result or ''}"
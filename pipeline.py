@@ -0,0 +1,209 @@
+"""
+Query pipeline shared by the Streamlit app and headless entry points:
+route -> SQL or RAG -> build_prompt -> generate.
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+from typing import Callable
+
+import config
+import telemetry
+
+from llm import gemini_client
+from llm.prompt_template import PromptBuild, assemble_prompt
+from tools.router import classify_locally, classify_with_llm, route_by_rules
+from tools.sql_tool import SqlResult, pick_sql_query, run_sql
+
+
+@dataclass
+class PipelineResult:
+    query: str
+    intent: str = ""
+    sql_query: str = ""
+    sql_result: SqlResult | None = None
+    snippets: list[str] = field(default_factory=list)
+    prompt: PromptBuild | None = None
+    response: str = ""
+    # Milliseconds per stage, in the order the stages ran.
+    timings: dict[str, float] = field(default_factory=dict)
+
+    @property
+    def context(self) -> str:
+        return "\n\n---\n\n".join(self.snippets)
+
+    @property
+    def sql_text(self) -> str:
+        return self.sql_result.to_text() if self.sql_result else ""
+
+    def to_dict(self, include_prompt: bool = False) -> dict:
+        """JSON-ready form; the prompt text is left out unless asked for."""
+        prompt = asdict(self.prompt) if self.prompt else None
+        if prompt and not include_prompt:
+            del prompt["text"]
+        return {
+            "query": self.query,
+            "intent": self.intent,
+            "sql_query": self.sql_query,
+            "sql_result": self.sql_result.to_dict() if self.sql_result else None,
+            "snippets": self.snippets,
+            "prompt": prompt,
+            "response": self.response,
+            "timings_ms": {stage: round(ms, 3) for stage, ms in self.timings.items()},
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "PipelineResult":
+        prompt = data.get("prompt")
+        return cls(
+            query=data["query"],
+            intent=data.get("intent", ""),
+            sql_query=data.get("sql_query", ""),
+            sql_result=SqlResult.from_dict(data["sql_result"]) if data.get("sql_result") else None,
+            snippets=list(data.get("snippets", ())),
+            prompt=PromptBuild(**{"text": "", **prompt}) if prompt else None,
+            response=data.get("response", ""),
+            timings=dict(data.get("timings_ms", {})),
+        )
+
+
+class _Timer:
+    def __init__(self, timings: dict[str, float], stage: str):
+        self._timings = timings
+        self._stage = stage
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self._timings[self._stage] = (time.perf_counter() - self._start) * 1000
+        return False
+
+
+_executor: ThreadPoolExecutor | None = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=config.SPECULATIVE_WORKERS, thread_name_prefix="speculative"
+            )
+    return _executor
+
+
+def _sql_branch(query: str) -> tuple[str, SqlResult, dict[str, float]]:
+    timings: dict[str, float] = {}
+    with _Timer(timings, "pick_sql_query"):
+        sql_query = pick_sql_query(query)
+    with _Timer(timings, "run_sql"):
+        sql_result = run_sql(sql_query)
+    return sql_query, sql_result, timings
+
+
+def _rag_branch(query: str) -> tuple[list[str], dict[str, float]]:
+    from rag.retriever import retrieve_snippets
+
+    timings: dict[str, float] = {}
+    with _Timer(timings, "retrieve"):
+        snippets = retrieve_snippets(query)
+    return snippets, timings
+
+
+def _gather_speculatively(query: str, result: "PipelineResult", notify) -> None:
+    """
+    Neither the rules nor the local classifier could decide, so the query
+    waits on a Gemini round trip. Run the data paths alongside it and keep
+    the branch that matches the decision. A started branch can't be
+    cancelled, so the loser still runs to completion in the background.
+    Retrieval is only started once the index is loaded: a branch waiting on
+    the warm-up would hold a pool worker that SQL queries need meanwhile.
+    """
+    from rag.retriever import get_retriever
+
+    executor = _get_executor()
+    start = time.perf_counter()
+    sql_future = executor.submit(_sql_branch, query)
+    rag_future = executor.submit(_rag_branch, query) if get_retriever().ready else None
+
+    classify_timings: dict[str, float] = {}
+    # Traced as llm_classify by the router; the route span has already closed.
+    with _Timer(classify_timings, "route"):
+        result.intent = classify_with_llm(query)
+    result.timings["route"] = result.timings.get("route", 0.0) + classify_timings["route"]
+
+    if result.intent == "sql":
+        notify("sql")
+        if rag_future:
+            rag_future.cancel()
+        result.sql_query, result.sql_result, branch_timings = sql_future.result()
+    else:
+        notify("retrieve")
+        sql_future.cancel()
+        if rag_future:
+            result.snippets, branch_timings = rag_future.result()
+        else:
+            result.snippets, branch_timings = _rag_branch(query)
+    result.timings.update(branch_timings)
+
+    # What the serial route-then-fetch pipeline would have spent, minus what we did.
+    serial_ms = classify_timings["route"] + sum(branch_timings.values())
+    result.timings["speculation_saved"] = max(
+        serial_ms - (time.perf_counter() - start) * 1000, 0.0
+    )
+
+
+def prepare(query: str, on_stage: Callable[[str], None] | None = None) -> PipelineResult:
+    """
+    Route the query, gather its grounding data and build the prompt.
+    on_stage is called with each stage name just before it runs, so a UI can
+    report progress.
+    """
+    notify = on_stage or (lambda stage: None)
+    result = PipelineResult(query=query)
+
+    notify("route")
+    with _Timer(result.timings, "route"), telemetry.span("route") as span:
+        decision = route_by_rules(query) or classify_locally(query)
+        # Speculating only pays for itself while waiting on Gemini.
+        speculate = decision is None and config.SPECULATIVE_EXECUTION
+        if decision is None and not speculate:
+            decision = classify_with_llm(query)
+        span.set(intent=decision or "undecided")
+
+    if speculate:
+        _gather_speculatively(query, result, notify)
+    else:
+        result.intent = decision
+
+        if result.intent == "sql":
+            notify("sql")
+            result.sql_query, result.sql_result, branch_timings = _sql_branch(query)
+        else:
+            notify("retrieve")
+            result.snippets, branch_timings = _rag_branch(query)
+        result.timings.update(branch_timings)
+
+    notify("build_prompt")
+    with _Timer(result.timings, "build_prompt"):
+        result.prompt = assemble_prompt(query, result.snippets, result.sql_result or "")
+    return result
+
+
+def answer(query: str, on_stage: Callable[[str], None] | None = None) -> PipelineResult:
+    """Run the whole pipeline, including the (cached) Gemini call."""
+    result = prepare(query, on_stage)
+    if on_stage:
+        on_stage("generate")
+    with _Timer(result.timings, "generate"):
+        result.response = gemini_client.generate_cached(
+            result.prompt.text,
+            query=query,
+            context=result.context,
+            sql_result=result.sql_text,
+        )
+    return result
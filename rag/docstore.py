@@ -0,0 +1,77 @@
+"""
+Read-only, offset-indexed document store for the cached FAISS index.
+
+docs.jsonl holds one JSON document per line, in index order, and
+docs.offsets.npy the byte offset where each line starts (plus the end of
+the file). Both are memory-mapped, so every process serving the same index
+shares one set of page-cache pages instead of unpickling its own copy of
+every Document.
+"""
+import json
+import mmap
+import os
+from collections.abc import Mapping
+from typing import Iterable
+
+import numpy as np
+from langchain_community.docstore.base import Docstore
+from langchain_core.documents import Document
+
+DOCS_FILE = "docs.jsonl"
+OFFSETS_FILE = "docs.offsets.npy"
+
+
+def write_docstore(directory: str, documents: Iterable) -> int:
+    """Write documents (anything with page_content and metadata); returns the count."""
+    offsets = [0]
+    with open(os.path.join(directory, DOCS_FILE), "wb") as f:
+        for doc in documents:
+            line = json.dumps(
+                {"page_content": doc.page_content, "metadata": doc.metadata}, ensure_ascii=False
+            ).encode("utf-8") + b"\n"
+            f.write(line)
+            offsets.append(offsets[-1] + len(line))
+    np.save(os.path.join(directory, OFFSETS_FILE), np.asarray(offsets, dtype=np.uint64))
+    return len(offsets) - 1
+
+
+class OffsetDocstore(Docstore):
+    """Documents looked up by position ("0", "1", ...) in a written docstore."""
+
+    def __init__(self, directory: str):
+        self._offsets = np.load(os.path.join(directory, OFFSETS_FILE), mmap_mode="r")
+        with open(os.path.join(directory, DOCS_FILE), "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            self._data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if size else b""
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    def search(self, search: str) -> Document | str:
+        try:
+            position = int(search)
+        except ValueError:
+            position = -1
+        if not 0 <= position < len(self):
+            return f"ID {search} not found."
+        start, end = int(self._offsets[position]), int(self._offsets[position + 1])
+        record = json.loads(self._data[start:end])
+        return Document(page_content=record["page_content"], metadata=record["metadata"])
+
+
+class PositionalIds(Mapping):
+    """index_to_docstore_id for an OffsetDocstore: FAISS row i maps to str(i)."""
+
+    def __init__(self, size: int):
+        self._size = size
+
+    def __getitem__(self, position: int) -> str:
+        if not 0 <= position < self._size:
+            raise KeyError(position)
+        return str(position)
+
+    def __iter__(self):
+        return iter(range(self._size))
+
+    def __len__(self) -> int:
+        return self._size
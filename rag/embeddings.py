@@ -0,0 +1,35 @@
+from typing import List
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+
+class FastEmbeddings(Embeddings):
+    def __init__(self, model_name: str, batch_size: int = 256, parallel: int | None = None):
+        from fastembed import TextEmbedding
+        self._model = TextEmbedding(model_name=model_name)
+        self._batch_size = batch_size
+        self._parallel = parallel
+
+    def embed_array(self, texts: List[str]) -> np.ndarray:
+        """Embeddings as one contiguous (len(texts), dim) float32 array."""
+        # fastembed's data-parallel workers only pay off for large inputs;
+        # small calls stay in-process to avoid the worker start-up cost.
+        parallel = self._parallel if len(texts) >= 4 * self._batch_size else None
+        matrix = None
+        for i, vec in enumerate(self._model.embed(texts, batch_size=self._batch_size, parallel=parallel)):
+            if matrix is None:
+                matrix = np.empty((len(texts), len(vec)), dtype=np.float32)
+            matrix[i] = vec
+        return matrix if matrix is not None else np.empty((0, 0), dtype=np.float32)
+
+    def embed_query_array(self, text: str) -> np.ndarray:
+        return np.asarray(next(self._model.embed([text])), dtype=np.float32)
+
+    # The LangChain interface returns lists; the index build, retriever and
+    # classifier use the array methods above instead.
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.embed_array(texts).tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_query_array(text).tolist()
@@ -1,17 +1,96 @@
 import json
-from langchain_core.documents import Document
+import os
+from typing import TYPE_CHECKING, Iterator
+
 import config
 
+if TYPE_CHECKING:
+    from langchain_core.documents import Document
+
+_TEXT_SUFFIXES = (".md", ".txt")
+
+
+def _iter_file(path: str) -> Iterator[dict]:
+    if path.endswith(".jsonl"):
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+    elif path.endswith(".json"):
+        with open(path, "r", encoding="utf-8") as f:
+            yield from json.load(f)
+    elif path.endswith(_TEXT_SUFFIXES):
+        with open(path, "r", encoding="utf-8") as f:
+            content = f.read()
+        title = os.path.splitext(os.path.basename(path))[0].replace("_", " ")
+        yield {"title": title, "content": content}
+
+
+def iter_entries(path: str | None = None) -> Iterator[tuple[dict, str]]:
+    """
+    Yield (entry, source) pairs from a .json array, a .jsonl file (read one
+    line at a time) or a directory of .json/.jsonl/.md/.txt files.
+    Defaults to config.KNOWLEDGE_PATH as it is when called.
+    """
+    path = path or config.KNOWLEDGE_PATH
+    if os.path.isdir(path):
+        for root, dirs, files in os.walk(path):
+            dirs.sort()
+            for name in sorted(files):
+                file_path = os.path.join(root, name)
+                source = os.path.relpath(file_path, path)
+                for entry in _iter_file(file_path):
+                    yield entry, source
+    else:
+        source = os.path.basename(path)
+        for entry in _iter_file(path):
+            yield entry, source
+
+
+def split_text(text: str, chunk_size: int, overlap: int) -> list[tuple[int, str]]:
+    """
+    Split text into chunks of at most chunk_size characters that overlap by
+    about `overlap` characters, breaking on whitespace where possible.
+    Returns (start offset, chunk) pairs.
+    """
+    if len(text) <= chunk_size:
+        return [(0, text)]
+
+    chunks = []
+    start = 0
+    while start < len(text):
+        end = min(start + chunk_size, len(text))
+        if end < len(text):
+            space = text.rfind(" ", start + chunk_size // 2, end)
+            if space != -1:
+                end = space
+        chunks.append((start, text[start:end].strip()))
+        if end >= len(text):
+            break
+        next_start = max(end - overlap, start + 1)
+        space = text.find(" ", next_start, end)
+        start = space + 1 if space != -1 else next_start
+    return chunks
+
+
+def iter_documents(path: str | None = None) -> Iterator["Document"]:
+    """Stream chunked Documents with provenance metadata."""
+    from langchain_core.documents import Document
+
+    for entry, source in iter_entries(path):
+        chunks = split_text(entry["content"], config.CHUNK_SIZE, config.CHUNK_OVERLAP)
+        for i, (offset, chunk) in enumerate(chunks):
+            yield Document(
+                page_content=chunk,
+                metadata={
+                    "title": entry["title"],
+                    "source": source,
+                    "chunk": i,
+                    "chunks": len(chunks),
+                    "offset": offset,
+                },
+            )
 
-def load_documents() -> list[Document]:
-    with open(config.KNOWLEDGE_PATH, "r", encoding="utf-8") as f:
-        entries = json.load(f)
 
-    documents = [
-        Document(
-            page_content=entry["content"],
-            metadata={"title": entry["title"]}
-        )
-        for entry in entries
-    ]
-    return documents
+def load_documents() -> list["Document"]:
+    return list(iter_documents())
@@ -1,20 +1,192 @@
-from rag.knowledge_loader import load_documents
-from rag.vector_store import build_index
+import re
+import threading
+from collections import OrderedDict
+
+from rag.vector_store import embed_vector, load_index
 import config
+import telemetry
 
-_documents = load_documents()
-_index = build_index(_documents)
 
+class _LRUCache:
+    def __init__(self, max_entries: int):
+        self._max_entries = max_entries
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
 
-def retrieve(query: str) -> str:
-    results = _index.similarity_search(query, k=config.RAG_TOP_K)
+    def get(self, key):
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value) -> None:
+        if self._max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+def _normalize_query(query: str) -> str:
+    # The embedding model is uncased, so case and spacing never change the vector.
+    return re.sub(r"\s+", " ", query).strip().lower()
+
+
+class Retriever:
+    """
+    Owns the FAISS index and loads it on a background thread so importing
+    this module (and serving SQL traffic) never waits for the embedding model.
+    Only the first retrieve() call that actually needs the index blocks.
+
+    Query embeddings and ranked results are kept in LRU caches keyed by the
+    normalized query text, so repeated queries skip model inference and the
+    FAISS search; both caches are cleared whenever the index is replaced.
+    Replacing the index bumps a generation, and a search or warm-up that
+    started on an older generation doesn't store its results.
+    """
+
+    def __init__(self):
+        self._index = None
+        self._error: BaseException | None = None
+        self._ready = threading.Event()
+        self._lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+        self._generation = 0
+        self._embedding_cache = _LRUCache(config.QUERY_EMBEDDING_CACHE_SIZE)
+        self._result_cache = _LRUCache(config.RETRIEVAL_CACHE_SIZE)
+
+    def start(self) -> None:
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._warmup, name="retriever-warmup", daemon=True
+                )
+                self._thread.start()
+
+    def _warmup(self) -> None:
+        generation = self._generation
+        try:
+            index, error = load_index(), None
+        except BaseException as exc:
+            index, error = None, exc
+        with self._lock:
+            # A reload() that finished first already installed a newer index.
+            if self._generation == generation:
+                self._index, self._error = index, error
+        self._ready.set()
+
+    def reload(self, rebuild: bool = False) -> None:
+        """Load (or rebuild) the index now and drop everything cached for the old one."""
+        index = load_index(rebuild=rebuild)
+        with self._lock:
+            self._generation += 1
+            self._index = index
+            self._error = None
+            self._embedding_cache.clear()
+            self._result_cache.clear()
+        self._ready.set()
+
+    def _current(self):
+        """The loaded index and its generation, waiting for the warm-up if needed."""
+        self.wait()
+        with self._lock:
+            return self._index, self._generation
+
+    def _put_if_current(self, cache: _LRUCache, generation: int, key, value) -> None:
+        with self._lock:
+            if self._generation == generation:
+                cache.put(key, value)
 
-    if not results:
-        return "No relevant knowledge found."
+    @property
+    def ready(self) -> bool:
+        return self._ready.is_set() and self._error is None
 
-    snippets = []
-    for doc in results:
-        title = doc.metadata.get("title", "Knowledge Entry")
-        snippets.append(f"**{title}**\n{doc.page_content}")
+    def wait(self, timeout: float | None = None):
+        self.start()
+        if not self._ready.wait(timeout):
+            raise TimeoutError("Knowledge index is still warming up.")
+        if self._error is not None:
+            raise RuntimeError("Knowledge index failed to load.") from self._error
+        return self._index
 
-    return "\n\n---\n\n".join(snippets)
+    @telemetry.traced("retrieve")
+    def retrieve_snippets(self, query: str, k: int | None = None) -> list[str]:
+        """Formatted snippets, most relevant first."""
+        k = k or config.RAG_TOP_K
+        key = _normalize_query(query)
+        cached = self._result_cache.get((key, k))
+        telemetry.incr("cache_requests_total", cache="retrieval", result="miss" if cached is None else "hit")
+        if cached is not None:
+            return list(cached)
+
+        index, generation = self._current()
+        vector = self._embedding_cache.get(key)
+        telemetry.incr("cache_requests_total", cache="query_embedding", result="miss" if vector is None else "hit")
+        if vector is None:
+            with telemetry.span("embed_query"):
+                vector = embed_vector(index.embedding_function, key)
+            self._put_if_current(self._embedding_cache, generation, key, vector)
+        with telemetry.span("faiss_search", k=k):
+            results = index.similarity_search_by_vector(vector, k=k)
+
+        snippets = []
+        for doc in results:
+            title = doc.metadata.get("title", "Knowledge Entry")
+            snippets.append(f"**{title}**\n{doc.page_content}")
+        self._put_if_current(self._result_cache, generation, (key, k), tuple(snippets))
+        return snippets
+
+    def cache_stats(self) -> dict:
+        return {
+            "embeddings": self._embedding_cache.stats(),
+            "results": self._result_cache.stats(),
+        }
+
+    def retrieve(self, query: str) -> str:
+        snippets = self.retrieve_snippets(query)
+        if not snippets:
+            return "No relevant knowledge found."
+        return "\n\n---\n\n".join(snippets)
+
+
+_retriever = Retriever()
+
+
+def get_retriever() -> Retriever:
+    return _retriever
+
+
+def warm_up() -> Retriever:
+    """Start loading the index in the background without blocking."""
+    _retriever.start()
+    return _retriever
+
+
+def retrieve_snippets(query: str) -> list[str]:
+    return _retriever.retrieve_snippets(query)
+
+
+def retrieve(query: str) -> str:
+    return _retriever.retrieve(query)
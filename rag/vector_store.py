@@ -1,24 +1,331 @@
-from typing import List
+import hashlib
+import math
+import os
+import shutil
+import threading
+from typing import TYPE_CHECKING, Iterable, Iterator
 
-from langchain_community.vectorstores import FAISS
-from langchain_core.embeddings import Embeddings
-from langchain_core.documents import Document
+from rag.knowledge_loader import iter_documents
 import config
 
+# numpy, faiss, fastembed and LangChain are imported inside the functions
+# that use them: importing this module (the retriever, peek_embeddings())
+# must not load the embedding stack.
+if TYPE_CHECKING:
+    from langchain_community.vectorstores import FAISS
+    from langchain_core.embeddings import Embeddings
+    from langchain_core.documents import Document
+    from rag.embeddings import FastEmbeddings
 
-class _FastEmbeddings(Embeddings):
-    def __init__(self, model_name: str):
-        from fastembed import TextEmbedding
-        self._model = TextEmbedding(model_name=model_name)
 
-    def embed_documents(self, texts: List[str]) -> List[List[float]]:
-        return [vec.tolist() for vec in self._model.embed(texts)]
+# IVF training wants roughly this many vectors per inverted list.
+_MIN_TRAIN_POINTS_PER_LIST = 39
+_MAX_TRAIN_POINTS = 256 * 1024
 
-    def embed_query(self, text: str) -> List[float]:
-        return next(self._model.embed([text])).tolist()
+# Bumped whenever the on-disk layout of a cache entry changes, so entries in
+# an older layout get a different fingerprint and are rebuilt and pruned.
+_CACHE_FORMAT = 2
+_INDEX_FILE = "index.faiss"
 
+_embeddings: "FastEmbeddings | None" = None
+_embeddings_lock = threading.Lock()
 
-def build_index(documents: list[Document]) -> FAISS:
-    embeddings = _FastEmbeddings(config.EMBEDDING_MODEL)
-    vector_store = FAISS.from_documents(documents, embeddings)
-    return vector_store
+
+def get_embeddings() -> "FastEmbeddings":
+    """Process-wide embedding model, loaded once and shared by all callers."""
+    global _embeddings
+    with _embeddings_lock:
+        if _embeddings is None:
+            from rag.embeddings import FastEmbeddings
+
+            _embeddings = FastEmbeddings(
+                config.EMBEDDING_MODEL,
+                batch_size=config.EMBED_BATCH_SIZE,
+                parallel=config.EMBED_PARALLEL,
+            )
+    return _embeddings
+
+
+def peek_embeddings() -> "FastEmbeddings | None":
+    """The shared embedding model if it is already loaded, without loading it."""
+    return _embeddings
+
+
+def embed_matrix(embeddings: "Embeddings", texts: list[str]):
+    """Document embeddings as a float32 array, without a list round-trip where possible."""
+    import numpy as np
+
+    if hasattr(embeddings, "embed_array"):
+        return embeddings.embed_array(texts)
+    return np.asarray(embeddings.embed_documents(texts), dtype=np.float32)
+
+
+def embed_vector(embeddings: "Embeddings", text: str):
+    """A query embedding as a float32 array."""
+    import numpy as np
+
+    if hasattr(embeddings, "embed_query_array"):
+        return embeddings.embed_query_array(text)
+    return np.asarray(embeddings.embed_query(text), dtype=np.float32)
+
+
+def _knowledge_files(path: str) -> list[str]:
+    if not os.path.isdir(path):
+        return [path]
+    files = []
+    for root, dirs, names in os.walk(path):
+        dirs.sort()
+        files.extend(os.path.join(root, name) for name in sorted(names))
+    return files
+
+
+def knowledge_fingerprint() -> str:
+    """
+    Hash of the knowledge base contents (a file or every file under a
+    directory), the embedding model name, chunking and index settings.
+    """
+    digest = hashlib.sha256()
+    settings = (
+        config.EMBEDDING_MODEL, config.CHUNK_SIZE, config.CHUNK_OVERLAP,
+        config.FAISS_INDEX_TYPE, config.FAISS_HNSW_M, config.FAISS_IVF_NLIST,
+        config.FAISS_PQ_M, config.FAISS_PQ_NBITS, config.FAISS_QUANTIZATION, config.FAISS_PCA_DIM,
+        _CACHE_FORMAT,
+    )
+    digest.update("|".join(map(str, settings)).encode("utf-8"))
+    for file_path in _knowledge_files(config.KNOWLEDGE_PATH):
+        digest.update(b"\0" + os.path.relpath(file_path, config.KNOWLEDGE_PATH).encode("utf-8") + b"\0")
+        with open(file_path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+    return digest.hexdigest()
+
+
+def _cache_path(fingerprint: str) -> str:
+    return os.path.join(config.INDEX_CACHE_DIR, fingerprint)
+
+
+def index_spec(num_vectors: int, dim: int) -> str:
+    """
+    faiss.index_factory description for the configured FAISS_INDEX_TYPE,
+    vector encoding (FAISS_QUANTIZATION) and PCA reduction (FAISS_PCA_DIM).
+    IVF variants need enough vectors to train their coarse quantizer (and PQ
+    codebooks); smaller corpora fall back to an exact flat index. PCA needs
+    at least as many vectors as input dimensions and is skipped otherwise.
+    """
+    prefix = ""
+    if 0 < config.FAISS_PCA_DIM < dim and num_vectors >= dim:
+        prefix, dim = f"PCA{config.FAISS_PCA_DIM},", config.FAISS_PCA_DIM
+    # IVF-PQ is already quantized; SQ8 applies to the flat, HNSW and IVF storage.
+    storage = "SQ8" if config.FAISS_QUANTIZATION.lower() == "sq8" else "Flat"
+
+    kind = config.FAISS_INDEX_TYPE.lower()
+    if kind == "hnsw":
+        return prefix + f"HNSW{config.FAISS_HNSW_M}" + ("" if storage == "Flat" else f",{storage}")
+    if kind in ("ivf", "ivfpq"):
+        nlist = config.FAISS_IVF_NLIST or int(4 * math.sqrt(num_vectors))
+        nlist = min(nlist, num_vectors // _MIN_TRAIN_POINTS_PER_LIST)
+        if nlist < 2:
+            return prefix + storage
+        if kind == "ivf":
+            return prefix + f"IVF{nlist},{storage}"
+        m = config.FAISS_PQ_M
+        if dim % m or num_vectors < _MIN_TRAIN_POINTS_PER_LIST * (1 << config.FAISS_PQ_NBITS):
+            return prefix + f"IVF{nlist},{storage}"
+        return prefix + f"IVF{nlist},PQ{m}x{config.FAISS_PQ_NBITS}"
+    return prefix + storage
+
+
+def make_index(vectors, spec: str | None = None):
+    """Create, train (if required) and fill a raw FAISS index."""
+    import faiss
+    import numpy as np
+
+    spec = spec or index_spec(len(vectors), vectors.shape[1])
+    index = faiss.index_factory(vectors.shape[1], spec)
+    if not index.is_trained:
+        rng = np.random.default_rng(0)
+        sample_size = min(len(vectors), _MAX_TRAIN_POINTS)
+        sample = vectors[rng.choice(len(vectors), sample_size, replace=False)]
+        index.train(sample)
+    index.add(vectors)
+    apply_search_params(index)
+    return index
+
+
+def apply_search_params(index, ef_search: int | None = None, nprobe: int | None = None) -> None:
+    """Set query-time knobs; parameters the index type doesn't have are skipped."""
+    import faiss
+
+    params = faiss.ParameterSpace()
+    for name, value in (
+        ("efSearch", ef_search or config.FAISS_HNSW_EF_SEARCH),
+        ("nprobe", nprobe or config.FAISS_IVF_NPROBE),
+    ):
+        try:
+            params.set_index_parameter(index, name, value)
+        except RuntimeError:
+            pass
+
+
+def build_index(documents: Iterable["Document"], embeddings: "Embeddings | None" = None) -> "FAISS":
+    """
+    Embed documents batch by batch, then build the configured FAISS index
+    (flat, HNSW or IVF/IVF-PQ) over all vectors at once so IVF variants, SQ8
+    and PCA can be trained on a sample of the whole corpus.
+    """
+    import numpy as np
+    from langchain_community.docstore.in_memory import InMemoryDocstore
+    from langchain_community.vectorstores import FAISS
+
+    embeddings = embeddings or get_embeddings()
+    docs: list["Document"] = []
+    vectors = []
+    for batch in _batched(documents, config.INGEST_BATCH_DOCS):
+        vectors.append(embed_matrix(embeddings, [doc.page_content for doc in batch]))
+        docs.extend(batch)
+    if not docs:
+        raise ValueError("Knowledge base is empty; nothing to index.")
+
+    index = make_index(np.vstack(vectors))
+    ids = [str(i) for i in range(len(docs))]
+    return FAISS(
+        embedding_function=embeddings,
+        index=index,
+        docstore=InMemoryDocstore(dict(zip(ids, docs))),
+        index_to_docstore_id=dict(enumerate(ids)),
+    )
+
+
+def _batched(items: Iterable, size: int) -> Iterator[list]:
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def read_faiss(path: str, mmap: bool | None = None):
+    """
+    Read a raw FAISS index, memory-mapped when FAISS_MMAP is on. IO_FLAG_MMAP_IFC
+    also maps flat and HNSW vector storage, which IO_FLAG_MMAP only does for
+    IVF inverted lists; both leave the pages file-backed and shared.
+    """
+    import faiss
+
+    flags = 0
+    if config.FAISS_MMAP if mmap is None else mmap:
+        flags = getattr(faiss, "IO_FLAG_MMAP_IFC", faiss.IO_FLAG_MMAP)
+    return faiss.read_index(path, flags)
+
+
+def write_cache_entry(path: str, index, documents: Iterable) -> None:
+    """Write a raw FAISS index and its documents (in index order) to a directory."""
+    import faiss
+    from rag.docstore import write_docstore
+
+    os.makedirs(path, exist_ok=True)
+    faiss.write_index(index, os.path.join(path, _INDEX_FILE))
+    if write_docstore(path, documents) != index.ntotal:
+        raise ValueError("Document count does not match the index.")
+
+
+def _open_entry(path: str):
+    from rag.docstore import OffsetDocstore
+
+    index = read_faiss(os.path.join(path, _INDEX_FILE))
+    docstore = OffsetDocstore(path)
+    if len(docstore) != index.ntotal:
+        raise ValueError(f"Cache entry {path} has {len(docstore)} documents for {index.ntotal} vectors.")
+    return index, docstore
+
+
+def _entry_opens(path: str) -> bool:
+    try:
+        _open_entry(path)
+        return True
+    except Exception:
+        return False
+
+
+def open_index(path: str, embeddings: "Embeddings") -> "FAISS":
+    """Open a cache entry without copying it: the index and docstore stay mapped."""
+    from langchain_community.vectorstores import FAISS
+    from rag.docstore import PositionalIds
+
+    index, docstore = _open_entry(path)
+    apply_search_params(index)
+    return FAISS(
+        embedding_function=embeddings,
+        index=index,
+        docstore=docstore,
+        index_to_docstore_id=PositionalIds(index.ntotal),
+    )
+
+
+def save_index(vector_store: "FAISS", fingerprint: str, replace: bool = False) -> str:
+    """
+    Publish a cache entry. An existing entry for the fingerprint is kept
+    only if it opens and replace is false (another process published the
+    same build first); otherwise it is swapped out for the new one.
+    """
+    path = _cache_path(fingerprint)
+    tmp_path = f"{path}.tmp-{os.getpid()}"
+    ids = vector_store.index_to_docstore_id
+    try:
+        write_cache_entry(
+            tmp_path,
+            vector_store.index,
+            (vector_store.docstore.search(ids[i]) for i in range(vector_store.index.ntotal)),
+        )
+    except BaseException:
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        raise
+    try:
+        os.replace(tmp_path, path)
+    except OSError:
+        # os.replace can't overwrite a non-empty directory.
+        if not replace and _entry_opens(path):
+            shutil.rmtree(tmp_path, ignore_errors=True)
+        else:
+            # Processes that still map the old files keep reading them.
+            old_path = f"{path}.old-{os.getpid()}"
+            os.replace(path, old_path)
+            os.replace(tmp_path, path)
+            shutil.rmtree(old_path, ignore_errors=True)
+
+    # Only the current fingerprint is ever loaded; drop stale builds.
+    for name in os.listdir(config.INDEX_CACHE_DIR):
+        if name != fingerprint and not name.startswith(f"{fingerprint}.tmp-"):
+            shutil.rmtree(os.path.join(config.INDEX_CACHE_DIR, name), ignore_errors=True)
+    return path
+
+
+def load_index(rebuild: bool = False) -> "FAISS":
+    """
+    Load the FAISS index from the on-disk cache, re-embedding the knowledge
+    base only when its fingerprint has changed (or when rebuild is forced).
+    """
+    embeddings = get_embeddings()
+    fingerprint = knowledge_fingerprint()
+    path = _cache_path(fingerprint)
+
+    # Set when the entry on disk must be replaced, not deferred to.
+    replace = rebuild
+    if not rebuild and os.path.isdir(path):
+        try:
+            return open_index(path, embeddings)
+        except Exception:
+            replace = True  # unreadable cache entry — rebuild and overwrite it
+
+    vector_store = build_index(iter_documents(), embeddings)
+    os.makedirs(config.INDEX_CACHE_DIR, exist_ok=True)
+    save_index(vector_store, fingerprint, replace=replace)
+    # Serve from the files just written, so the building process shares the
+    # same pages as every process that loads them later.
+    try:
+        return open_index(path, embeddings)
+    except Exception:
+        return vector_store
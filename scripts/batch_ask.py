@@ -0,0 +1,126 @@
+"""
+batch_ask.py — answer a file of questions headlessly with bounded concurrency.
+Each question runs the same route -> SQL/RAG -> build_prompt -> generate
+pipeline as the app. Results are appended to a JSONL file as they finish,
+with per-stage timings; re-running with the same output file skips IDs that
+were already answered, so an interrupted run simply resumes.
+
+Input is CSV (columns: id, question) or JSONL ({"id": ..., "question": ...});
+rows without an id are numbered by position.
+Run from the project root:
+    python scripts/batch_ask.py questions.csv results.jsonl [--concurrency 4]
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from pipeline import answer
+from rag.retriever import warm_up
+
+
+def read_questions(path: str):
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        if path.endswith(".jsonl"):
+            rows = (json.loads(line) for line in f if line.strip())
+        else:
+            rows = csv.DictReader(f)
+        for position, row in enumerate(rows, start=1):
+            question = (row.get("question") or "").strip()
+            if question:
+                question_id = row.get("id")
+                # A JSONL id of 0 is a real id, not a missing one.
+                yield str(question_id if question_id not in (None, "") else position), question
+
+
+def answered_ids(path: str) -> set[str]:
+    done = set()
+    if not os.path.exists(path):
+        return done
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # partial line from an interrupted write
+            if not record.get("error"):
+                done.add(str(record["id"]))
+    return done
+
+
+def run_one(question_id: str, question: str) -> dict:
+    start = time.perf_counter()
+    record = {"id": question_id, "question": question}
+    try:
+        result = answer(question)
+        record.update(
+            intent=result.intent,
+            sql_query=result.sql_query,
+            sql_rows=result.sql_result.row_count if result.sql_result else None,
+            snippets=len(result.snippets),
+            prompt_tokens=result.prompt.estimated_tokens,
+            response=result.response,
+            timings_ms={stage: round(ms, 2) for stage, ms in result.timings.items()},
+        )
+    except Exception as exc:
+        record["error"] = f"{type(exc).__name__}: {exc}"
+    record["total_ms"] = round((time.perf_counter() - start) * 1000, 2)
+    return record
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Answer a CSV/JSONL file of questions.")
+    parser.add_argument("input")
+    parser.add_argument("output")
+    parser.add_argument("--concurrency", type=int, default=4)
+    args = parser.parse_args()
+
+    done = answered_ids(args.output)
+    warm_up()
+
+    write_lock = threading.Lock()
+    counts = {"answered": 0, "failed": 0, "skipped": 0}
+    start = time.perf_counter()
+
+    with open(args.output, "a", encoding="utf-8") as out, \
+            ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+
+        # Keep at most 2x concurrency questions in flight so huge input
+        # files are never loaded into the executor queue all at once.
+        slots = threading.BoundedSemaphore(2 * args.concurrency)
+
+        def record_result(future):
+            # Runs as each question finishes, so an interrupted run loses
+            # nothing that was already answered.
+            try:
+                record = future.result()
+                with write_lock:
+                    out.write(json.dumps(record, ensure_ascii=False) + "\n")
+                    out.flush()
+                    counts["failed" if record.get("error") else "answered"] += 1
+                status = "FAIL" if record.get("error") else "OK"
+                print(f"[{status}] {record['id']} ({record['total_ms']:.0f} ms)")
+            finally:
+                slots.release()
+
+        for question_id, question in read_questions(args.input):
+            if question_id in done:
+                counts["skipped"] += 1
+                continue
+            slots.acquire()
+            pool.submit(run_one, question_id, question).add_done_callback(record_result)
+
+    elapsed = time.perf_counter() - start
+    print(
+        f"\nDone in {elapsed:.1f}s: {counts['answered']} answered, "
+        f"{counts['failed']} failed, {counts['skipped']} skipped (already answered)."
+    )
+
+
+if __name__ == "__main__":
+    main()
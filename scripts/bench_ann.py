@@ -0,0 +1,79 @@
+"""
+bench_ann.py — recall@k vs. query latency of the FAISS index types that
+rag/vector_store.py can build (flat, HNSW, IVF, IVF-PQ), measured on a
+synthetic clustered corpus against exact flat-search ground truth.
+Run from the project root:
+    python scripts/bench_ann.py [--size 100000] [--dim 384] [--queries 1000] [--k 10]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import config
+from bench_vectors import latency_ms, recall, synthetic_corpus
+from rag.vector_store import apply_search_params, index_spec, make_index
+
+
+def _spec_for(kind: str, size: int, dim: int) -> str:
+    """The index_factory string the app builds for FAISS_INDEX_TYPE=kind."""
+    saved = config.FAISS_INDEX_TYPE
+    config.FAISS_INDEX_TYPE = kind
+    try:
+        return index_spec(size, dim)
+    finally:
+        config.FAISS_INDEX_TYPE = saved
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark FAISS index types: recall@k vs latency.")
+    parser.add_argument("--size", type=int, default=100_000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=1000)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--threads", type=int, default=1, help="FAISS OpenMP threads.")
+    args = parser.parse_args()
+
+    import faiss
+    faiss.omp_set_num_threads(args.threads)
+
+    corpus, queries = synthetic_corpus(args.size, args.dim, args.queries)
+    latency_sample = queries[: min(200, len(queries))]
+    print(f"Corpus: {args.size:,} x {args.dim}  queries: {args.queries}  k={args.k}  threads={args.threads}\n")
+
+    settings_by_kind = {
+        "flat": [{}],
+        "hnsw": [{"ef_search": ef} for ef in (16, 64, 256)],
+        "ivf": [{"nprobe": p} for p in (1, 8, 32, 128)],
+        "ivfpq": [{"nprobe": p} for p in (8, 32, 128)],
+    }
+    candidates = {}
+    for kind, settings in settings_by_kind.items():
+        # Kinds that fall back (e.g. IVF-PQ when --dim isn't a multiple of
+        # FAISS_PQ_M) would repeat an earlier spec.
+        candidates.setdefault(_spec_for(kind, args.size, args.dim), settings)
+
+    exact = faiss.IndexFlatL2(args.dim)
+    exact.add(corpus)
+    _, truth = exact.search(queries, args.k)
+    print(f"  {'index':<22} {'params':<16} {'build s':>8} {'recall@k':>9} {'p50 ms':>8} {'p95 ms':>8} {'MB':>8}")
+    for spec, settings in candidates.items():
+        start = time.perf_counter()
+        index = make_index(corpus, spec)
+        build_secs = time.perf_counter() - start
+        size_mb = faiss.serialize_index(index).nbytes / 1e6
+
+        for params in settings:
+            apply_search_params(index, **params)
+            _, found = index.search(queries, args.k)
+            p50, p95 = latency_ms(index, latency_sample, args.k)
+            label = ", ".join(f"{k}={v}" for k, v in params.items()) or "exact"
+            print(f"  {spec:<22} {label:<16} {build_secs:8.1f} {recall(found, truth, args.k):9.3f} "
+                  f"{p50:8.3f} {p95:8.3f} {size_mb:8.1f}")
+
+
+if __name__ == "__main__":
+    main()
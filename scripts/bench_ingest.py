@@ -0,0 +1,74 @@
+"""
+bench_ingest.py — knowledge-base ingestion throughput (documents/sec and
+chunks/sec) for the streaming loader, chunker and batched embedding.
+Run from the project root against the configured knowledge base, a .jsonl
+file or directory, or a synthetic set of long playbooks:
+    python scripts/bench_ingest.py [--path data/playbooks/] [--synthetic 2000] [--parallel 0]
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+os.environ["TOKENIZERS_PARALLELISM"] = "false"
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import config
+from rag.knowledge_loader import iter_documents, iter_entries
+from rag.embeddings import FastEmbeddings
+from rag.vector_store import build_index
+
+
+def write_synthetic(count: int, path: str, source: str | None = None) -> None:
+    """Write `count` long playbooks (.jsonl) stitched from sentences of a .json knowledge base."""
+    with open(source or config.KNOWLEDGE_PATH, "r", encoding="utf-8") as f:
+        sentences = [s.strip() + "." for e in json.load(f) for s in e["content"].split(".") if s.strip()]
+    rng = random.Random(42)
+    with open(path, "w", encoding="utf-8") as f:
+        for i in range(count):
+            content = " ".join(rng.choice(sentences) for _ in range(rng.randint(20, 60)))
+            f.write(json.dumps({"title": f"Playbook {i}", "content": content}) + "\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark knowledge-base ingestion.")
+    parser.add_argument("--path", default=config.KNOWLEDGE_PATH)
+    parser.add_argument("--synthetic", type=int, help="Generate N synthetic playbooks instead of --path.")
+    parser.add_argument("--parallel", type=int, default=config.EMBED_PARALLEL,
+                        help="fastembed data-parallel workers (0 = all cores).")
+    args = parser.parse_args()
+
+    tmp_dir = None
+    path = args.path
+    if args.synthetic:
+        tmp_dir = tempfile.TemporaryDirectory()
+        path = os.path.join(tmp_dir.name, "playbooks.jsonl")
+        write_synthetic(args.synthetic, path)
+
+    documents = sum(1 for _ in iter_entries(path))
+
+    start = time.perf_counter()
+    chunks = sum(1 for _ in iter_documents(path))
+    chunk_secs = time.perf_counter() - start
+
+    embeddings = FastEmbeddings(config.EMBEDDING_MODEL, config.EMBED_BATCH_SIZE, args.parallel)
+    start = time.perf_counter()
+    index = build_index(iter_documents(path), embeddings)
+    embed_secs = time.perf_counter() - start
+
+    print(f"Source:   {path}")
+    print(f"Input:    {documents} documents -> {chunks} chunks "
+          f"(chunk {config.CHUNK_SIZE} chars, overlap {config.CHUNK_OVERLAP})")
+    print(f"Load+chunk:  {chunk_secs:8.2f}s  {documents / chunk_secs:10,.0f} docs/sec  {chunks / chunk_secs:10,.0f} chunks/sec")
+    print(f"Embed+index: {embed_secs:8.2f}s  {documents / embed_secs:10,.0f} docs/sec  {chunks / embed_secs:10,.0f} chunks/sec")
+    print(f"Index size:  {index.index.ntotal} vectors  (batch {config.EMBED_BATCH_SIZE}, parallel={args.parallel})")
+
+    if tmp_dir:
+        tmp_dir.cleanup()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,171 @@
+"""
+bench_memory.py — per-worker memory of the knowledge index when N worker
+processes serve it, memory-mapped (the cache format load_index() opens)
+versus read into each process's heap (FAISS_MMAP=0, every Document held as
+a Python object, as the pickled docstore used to be).
+
+Workers are forked from a parent that has not loaded the index, like the
+pre-forked API server. Each one loads the index, runs searches and fetches
+documents, then reports RSS (anonymous / file-backed) and PSS, which splits
+shared pages between the processes mapping them; total PSS is what the
+workers cost the machine together. Needs Linux (/proc/<pid>/smaps_rollup).
+Run from the project root:
+    python scripts/bench_memory.py [--vectors 200000] [--dim 384] [--workers 1 4 8]
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import shutil
+import sys
+import tempfile
+import time
+from types import SimpleNamespace
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import config
+from rag.docstore import DOCS_FILE, OffsetDocstore
+from rag.vector_store import index_spec, make_index, read_faiss, write_cache_entry
+
+_WORDS = ("churn", "retention", "offer", "tariff", "roaming", "discount", "bundle", "loyalty",
+          "complaint", "network", "upgrade", "contract", "subscriber", "campaign", "usage")
+
+
+def _write_corpus(path: str, vectors: int, dim: int, doc_chars: int, spec: str | None) -> str:
+    rng = np.random.default_rng(42)
+    matrix = rng.standard_normal((vectors, dim)).astype(np.float32)
+    matrix /= np.linalg.norm(matrix, axis=1, keepdims=True)
+    index = make_index(matrix, spec)
+    words = np.array(_WORDS)[rng.integers(0, len(_WORDS), doc_chars // 8)]
+    text = " ".join(words)[:doc_chars]
+    docs = (
+        SimpleNamespace(page_content=f"{i} {text}", metadata={"title": f"Playbook {i // 4}", "chunk": i % 4})
+        for i in range(vectors)
+    )
+    write_cache_entry(path, index, docs)
+    return index_spec(vectors, dim) if spec is None else spec
+
+
+def _memory_kb() -> dict:
+    usage = {}
+    with open("/proc/self/status") as f:
+        for line in f:
+            key, _, value = line.partition(":")
+            if key in ("VmRSS", "RssAnon", "RssFile"):
+                usage[key] = int(value.split()[0])
+    with open("/proc/self/smaps_rollup") as f:
+        for line in f:
+            key, _, value = line.partition(":")
+            if key == "Pss":
+                usage["Pss"] = int(value.split()[0])
+    return usage
+
+
+def _load_ram(path: str):
+    from langchain_core.documents import Document
+
+    index = read_faiss(os.path.join(path, "index.faiss"), mmap=False)
+    docs = {}
+    with open(os.path.join(path, DOCS_FILE), encoding="utf-8") as f:
+        for i, line in enumerate(f):
+            docs[str(i)] = Document(**json.loads(line))
+    return index, docs.get
+
+
+def _load_mmap(path: str):
+    return read_faiss(os.path.join(path, "index.faiss"), mmap=True), OffsetDocstore(path).search
+
+
+def _worker(mode, path, queries, k, fetch_all, barrier, results, release):
+    baseline = _memory_kb()
+    index, fetch = (_load_mmap if mode == "mmap" else _load_ram)(path)
+    rng = np.random.default_rng(os.getpid())
+    probe = rng.standard_normal((queries, index.d)).astype(np.float32)
+    _, ids = index.search(probe, k)
+    for i in ids.ravel():
+        fetch(str(int(i)))
+    if fetch_all:
+        for i in range(index.ntotal):
+            fetch(str(i))
+    barrier.wait()  # measure while every worker still maps the files
+    usage = _memory_kb()
+    usage["PssDelta"] = usage["Pss"] - baseline["Pss"]
+    results.put(usage)
+    release.wait()
+
+
+def _run(mode: str, workers: int, args, path: str) -> list[dict]:
+    ctx = multiprocessing.get_context("fork")
+    barrier, results, release = ctx.Barrier(workers), ctx.Queue(), ctx.Event()
+    procs = [
+        ctx.Process(target=_worker, args=(mode, path, args.queries, args.k, not args.search_only,
+                                          barrier, results, release))
+        for _ in range(workers)
+    ]
+    for proc in procs:
+        proc.start()
+    usage = [results.get(timeout=args.timeout) for _ in procs]
+    release.set()
+    for proc in procs:
+        proc.join()
+    return usage
+
+
+def _drop_page_cache(path: str) -> None:
+    # Start each run cold so resident file pages belong to that run only.
+    for name in os.listdir(path):
+        fd = os.open(os.path.join(path, name), os.O_RDONLY)
+        try:
+            os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+        finally:
+            os.close(fd)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark per-worker memory of the knowledge index.")
+    parser.add_argument("--vectors", type=int, default=200_000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--doc-chars", type=int, default=config.CHUNK_SIZE)
+    parser.add_argument("--spec", help="faiss.index_factory string (default: the configured FAISS_INDEX_TYPE).")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4, 8])
+    parser.add_argument("--modes", nargs="+", choices=("mmap", "ram"), default=["mmap", "ram"])
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=config.RAG_TOP_K)
+    parser.add_argument("--search-only", action="store_true",
+                        help="Fetch only the search hits instead of every document.")
+    parser.add_argument("--timeout", type=float, default=600.0)
+    args = parser.parse_args()
+
+    if not os.path.exists("/proc/self/smaps_rollup"):
+        sys.exit("bench_memory.py needs Linux /proc/<pid>/smaps_rollup.")
+
+    tmp_dir = tempfile.mkdtemp(prefix="bench_memory_")
+    try:
+        start = time.perf_counter()
+        spec = _write_corpus(tmp_dir, args.vectors, args.dim, args.doc_chars, args.spec)
+        sizes = {name: os.path.getsize(os.path.join(tmp_dir, name)) / 2**20 for name in os.listdir(tmp_dir)}
+        print(f"Corpus: {args.vectors:,} x {args.dim} ({spec}), built in {time.perf_counter() - start:.1f}s")
+        print("Files:  " + "  ".join(f"{name} {mb:.1f} MB" for name, mb in sorted(sizes.items())) + "\n")
+
+        print(f"  {'mode':<5} {'workers':>7} {'RSS MB':>8} {'anon MB':>8} {'file MB':>8} "
+              f"{'PSS MB':>8} {'index PSS':>10} {'total PSS':>10}")
+        for mode in args.modes:
+            for workers in args.workers:
+                _drop_page_cache(tmp_dir)
+                usage = _run(mode, workers, args, tmp_dir)
+
+                def mean(key):
+                    return sum(u[key] for u in usage) / len(usage) / 1024
+
+                total = sum(u["Pss"] for u in usage) / 1024
+                print(f"  {mode:<5} {workers:>7} {mean('VmRSS'):8.1f} {mean('RssAnon'):8.1f} "
+                      f"{mean('RssFile'):8.1f} {mean('Pss'):8.1f} {mean('PssDelta'):10.1f} {total:10.1f}")
+        print("\nPer-worker means; 'index PSS' is the growth from loading and querying the index.")
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,258 @@
+"""
+bench_pipeline.py — offline per-stage latency of the full pipeline
+(route, pick_sql_query, run_sql, retrieve, build_prompt, generate).
+Gemini is replaced by a deterministic fake with configurable latency and
+output, for both report generation and ambiguous-query classification, so
+no API key or network is needed. Caches are disabled unless --warm-caches.
+
+Each run measures one scenario (database size x knowledge base size) and
+prints p50/p95/p99 per stage. --save merges the result into a JSON baseline
+keyed by scenario; --compare checks a later run against it and exits 1 when
+a stage regressed by more than --tolerance.
+Run from the project root:
+    python scripts/bench_pipeline.py --rows 1000000 --docs 2000 --save bench/baseline.json
+    python scripts/bench_pipeline.py --rows 1000000 --docs 2000 --compare bench/baseline.json
+"""
+import argparse
+import hashlib
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+os.environ["TOKENIZERS_PARALLELISM"] = "false"
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import config
+from bench_ingest import write_synthetic
+
+STAGES = ("route", "pick_sql_query", "run_sql", "retrieve", "build_prompt", "generate")
+
+QUERIES = [
+    # Decided by the keyword rules
+    "List top 3 highest churn probability subscribers.",
+    "Show average churn probability by segment.",
+    "How many subscribers are on month-to-month contracts?",
+    "What is the total monthly revenue by segment?",
+    "Why is churn highest among early subscribers?",
+    "What strategies should we use to retain at-risk customers?",
+    "Explain the contract risk insight.",
+    "How does service bundling affect churn?",
+    # Ambiguous: local classifier, then the fake Gemini classifier
+    "Tell me about the loyal customer group.",
+    "Which plan change matters most for premium users?",
+]
+
+_FAKE_REPORT = (
+    "### Summary\nOffline benchmark response.\n\n"
+    "### Data Evidence\n- Fake backend output.\n\n"
+    "### Strategic Recommendation\n- None."
+)
+
+
+class FakeGemini:
+    """Stands in for gemini_client.generate and router._llm_classify."""
+
+    def __init__(self, latency_ms: float, classify_latency_ms: float, label: str, response: str):
+        self._latency = latency_ms / 1000
+        self._classify_latency = classify_latency_ms / 1000
+        self._label = label
+        self._response = response
+        self.calls = 0
+        self.classifications = 0
+
+    def generate(self, prompt: str) -> str:
+        self.calls += 1
+        time.sleep(self._latency)
+        digest = hashlib.sha256(prompt.encode("utf-8")).hexdigest()[:12]
+        return f"{self._response}\n\n<!-- prompt {digest} -->"
+
+    def classify(self, query: str) -> str:
+        self.classifications += 1
+        time.sleep(self._classify_latency)
+        return self._label
+
+
+def _percentile(values: list[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def summarize(samples: dict[str, list[float]]) -> dict[str, dict]:
+    return {
+        stage: {
+            "count": len(values),
+            "p50": _percentile(values, 0.50),
+            "p95": _percentile(values, 0.95),
+            "p99": _percentile(values, 0.99),
+            "mean": sum(values) / len(values),
+        }
+        for stage, values in samples.items()
+        if values
+    }
+
+
+def _count_rows(db_path: str) -> int:
+    import sqlite3
+
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    try:
+        return conn.execute("SELECT COUNT(*) FROM subscribers;").fetchone()[0]
+    finally:
+        conn.close()
+
+
+def _scenario_key(scenario: dict) -> str:
+    return ",".join(f"{name}={scenario[name]}" for name in sorted(scenario))
+
+
+def save_baseline(path: str, scenario: dict, stats: dict) -> None:
+    baseline = {"scenarios": {}}
+    if os.path.exists(path):
+        with open(path, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+    baseline["scenarios"][_scenario_key(scenario)] = {
+        "scenario": scenario,
+        "stages": stats,
+        "recorded_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+    }
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(baseline, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+def compare_baseline(path: str, scenario: dict, stats: dict, tolerance: float) -> bool:
+    """Print the change per stage; False if any p50/p95 grew beyond tolerance."""
+    with open(path, "r", encoding="utf-8") as f:
+        recorded = json.load(f)["scenarios"].get(_scenario_key(scenario))
+    if recorded is None:
+        print(f"\nNo baseline for scenario {_scenario_key(scenario)} in {path}.")
+        return False
+
+    ok = True
+    print(f"\nAgainst {path} (recorded {recorded['recorded_at']}, tolerance {tolerance:.0%}):")
+    for stage in STAGES:
+        if stage not in stats or stage not in recorded["stages"]:
+            continue
+        changes = []
+        for metric in ("p50", "p95"):
+            before = recorded["stages"][stage][metric]
+            after = stats[stage][metric]
+            change = (after - before) / max(before, 1e-6)
+            # Sub-0.05 ms stages are timer noise; don't fail on them.
+            regressed = change > tolerance and after - before > 0.05
+            ok = ok and not regressed
+            changes.append(f"{metric} {before:9.3f} -> {after:9.3f} ms ({change:+6.0%}){' REGRESSED' if regressed else ''}")
+        print(f"  {stage:<15} " + "   ".join(changes))
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark pipeline stages offline with a fake Gemini.")
+    parser.add_argument("--rows", type=int, help="Seed a temporary database with N rows (default: config.DB_PATH).")
+    parser.add_argument("--db", help="Use an existing (e.g. pre-seeded scaled) database.")
+    parser.add_argument("--docs", type=int, help="Index N synthetic playbooks (default: config.KNOWLEDGE_PATH).")
+    parser.add_argument("--iterations", type=int, default=20, help="Passes over the query set.")
+    parser.add_argument("--gemini-latency-ms", type=float, default=800.0)
+    parser.add_argument("--classify-latency-ms", type=float, default=300.0)
+    parser.add_argument("--classify-label", choices=("sql", "rag"), default="rag",
+                        help="What the fake classifier answers for ambiguous queries.")
+    parser.add_argument("--response", default=_FAKE_REPORT, help="Text the fake Gemini returns.")
+    parser.add_argument("--warm-caches", action="store_true",
+                        help="Keep the SQL, retrieval and response caches enabled.")
+    parser.add_argument("--speculative", action="store_true",
+                        help="Keep speculative SQL/RAG execution (stage times then overlap).")
+    parser.add_argument("--save", metavar="BASELINE", help="Merge this run into a JSON baseline file.")
+    parser.add_argument("--compare", metavar="BASELINE", help="Compare this run with a JSON baseline file.")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed p50/p95 growth before failing.")
+    args = parser.parse_args()
+
+    tmp_dir = tempfile.TemporaryDirectory()
+    config.SPECULATIVE_EXECUTION = args.speculative
+    if not args.warm_caches:
+        config.SQL_CACHE_ENABLED = False
+        config.RESPONSE_CACHE_ENABLED = False
+        config.QUERY_EMBEDDING_CACHE_SIZE = 0
+        config.RETRIEVAL_CACHE_SIZE = 0
+
+    db_path = args.db or config.DB_PATH
+    if args.rows:
+        from seed_db import seed_scaled
+
+        db_path = os.path.join(tmp_dir.name, "subscribers.db")
+        seed_scaled(args.rows, db_path)
+    config.DB_PATH = db_path
+
+    if args.docs:
+        path = os.path.join(tmp_dir.name, "playbooks.jsonl")
+        write_synthetic(args.docs, path)
+        config.KNOWLEDGE_PATH = path
+        # Keep the synthetic index out of (and from pruning) the app's cache.
+        config.INDEX_CACHE_DIR = os.path.join(tmp_dir.name, "index_cache")
+
+    # Imported after the config overrides above: the pool, caches and
+    # retriever read their settings when they are first created.
+    import pipeline
+    from llm import gemini_client
+    from rag.retriever import get_retriever
+    from tools import router
+
+    fake = FakeGemini(args.gemini_latency_ms, args.classify_latency_ms, args.classify_label, args.response)
+    gemini_client.generate = fake.generate
+    router._llm_classify = fake.classify
+
+    start = time.perf_counter()
+    get_retriever().wait()
+    print(f"Knowledge index ready in {time.perf_counter() - start:.1f}s")
+
+    for query in QUERIES:  # warm-up pass: model sessions, pool, page cache
+        pipeline.answer(query)
+
+    samples = {stage: [] for stage in STAGES}
+    samples["total"] = []
+    for _ in range(args.iterations):
+        for query in QUERIES:
+            result = pipeline.answer(query)
+            for stage in STAGES:
+                if stage in result.timings:
+                    samples[stage].append(result.timings[stage])
+            samples["total"].append(sum(result.timings[s] for s in STAGES if s in result.timings))
+
+    scenario = {
+        # The row count identifies the database whether it came from --rows,
+        # --db or the default, so runs on different data never share a key.
+        "rows": args.rows or _count_rows(db_path),
+        "docs": args.docs or "default",
+        "gemini_latency_ms": args.gemini_latency_ms,
+        "classify_latency_ms": args.classify_latency_ms,
+        "warm_caches": args.warm_caches,
+        "speculative": args.speculative,
+    }
+    stats = summarize(samples)
+
+    print(f"\nScenario: {_scenario_key(scenario)}")
+    print(f"{len(QUERIES)} queries x {args.iterations} passes; fake Gemini calls: "
+          f"{fake.calls} generate, {fake.classifications} classify\n")
+    print(f"  {'stage':<15} {'n':>5} {'p50 ms':>10} {'p95 ms':>10} {'p99 ms':>10}")
+    for stage, row in stats.items():
+        print(f"  {stage:<15} {row['count']:>5} {row['p50']:10.3f} {row['p95']:10.3f} {row['p99']:10.3f}")
+
+    ok = True
+    if args.compare:
+        ok = compare_baseline(args.compare, scenario, stats, args.tolerance)
+    if args.save:
+        save_baseline(args.save, scenario, stats)
+        print(f"\nBaseline saved to {args.save}")
+    tmp_dir.cleanup()
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
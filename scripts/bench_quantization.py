@@ -0,0 +1,121 @@
+"""
+bench_quantization.py — recall / memory / latency trade-off of the stored
+vector encodings rag/vector_store.py can build for the configured
+FAISS_INDEX_TYPE: float32 (the current setup), int8 scalar quantization
+(FAISS_QUANTIZATION=sq8) and PCA reduction (FAISS_PCA_DIM), alone and
+combined. Recall@k is measured against exact float32 search.
+
+The default corpus is synthetic: clustered vectors with a decaying
+spectrum, like sentence embeddings. --knowledge embeds a real knowledge
+base with the configured model instead; its queries are the opening words
+of sampled chunks.
+Run from the project root:
+    python scripts/bench_quantization.py [--size 100000] [--dim 384] [--pca-dims 192 128 96]
+    python scripts/bench_quantization.py --knowledge data/playbooks/
+"""
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import config
+from bench_vectors import latency_ms, recall, synthetic_corpus
+from rag.vector_store import apply_search_params, index_spec, make_index
+
+_LIST_SAMPLE_ROWS = 10_000
+
+
+def _knowledge_corpus(path: str, queries: int, seed: int = 42):
+    from rag.knowledge_loader import iter_documents
+    from rag.vector_store import embed_matrix, get_embeddings
+
+    texts = [doc.page_content for doc in iter_documents(path)]
+    embeddings = get_embeddings()
+    corpus = np.vstack([
+        embed_matrix(embeddings, texts[i:i + config.INGEST_BATCH_DOCS])
+        for i in range(0, len(texts), config.INGEST_BATCH_DOCS)
+    ])
+    rng = np.random.default_rng(seed)
+    sample = rng.choice(len(texts), min(queries, len(texts)), replace=False)
+    probe = embed_matrix(embeddings, [" ".join(texts[i].split()[:12]) for i in sample])
+    return corpus, probe
+
+
+def _list_overhead_mb(corpus) -> tuple[float, float]:
+    """Peak MB per 1,000 vectors held as Python float lists vs as a float32 array."""
+    sample = corpus[:_LIST_SAMPLE_ROWS]
+    tracemalloc.start()
+    as_lists = sample.tolist()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del as_lists
+    per_thousand = 1000 / len(sample)
+    return peak * per_thousand / 2**20, sample.nbytes * per_thousand / 2**20
+
+
+def _spec_for(size: int, dim: int, quantization: str, pca_dim: int) -> str:
+    saved = config.FAISS_QUANTIZATION, config.FAISS_PCA_DIM
+    config.FAISS_QUANTIZATION, config.FAISS_PCA_DIM = quantization, pca_dim
+    try:
+        return index_spec(size, dim)
+    finally:
+        config.FAISS_QUANTIZATION, config.FAISS_PCA_DIM = saved
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark float32 vs SQ8 vs PCA vector storage.")
+    parser.add_argument("--size", type=int, default=100_000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--knowledge", help="Embed this knowledge base instead of a synthetic corpus.")
+    parser.add_argument("--queries", type=int, default=1000)
+    parser.add_argument("--k", type=int, default=config.RAG_TOP_K)
+    parser.add_argument("--pca-dims", type=int, nargs="*", default=[192, 128, 96])
+    parser.add_argument("--threads", type=int, default=1, help="FAISS OpenMP threads.")
+    args = parser.parse_args()
+
+    import faiss
+    faiss.omp_set_num_threads(args.threads)
+
+    if args.knowledge:
+        corpus, queries = _knowledge_corpus(args.knowledge, args.queries)
+    else:
+        corpus, queries = synthetic_corpus(args.size, args.dim, args.queries, spectrum=True)
+    size, dim = corpus.shape
+    list_mb, array_mb = _list_overhead_mb(corpus)
+    print(f"Corpus: {size:,} x {dim}  queries: {len(queries)}  k={args.k}  "
+          f"index type: {config.FAISS_INDEX_TYPE}  threads={args.threads}")
+    print(f"Embeddings per 1,000 vectors: {list_mb:.1f} MB as Python lists, {array_mb:.1f} MB as float32\n")
+
+    exact = faiss.IndexFlatL2(dim)
+    exact.add(corpus)
+    _, truth = exact.search(queries, args.k)
+
+    variants = [("float32", "none", 0), ("sq8", "sq8", 0)]
+    for pca_dim in args.pca_dims:
+        variants += [(f"pca{pca_dim}", "none", pca_dim), (f"pca{pca_dim}+sq8", "sq8", pca_dim)]
+
+    latency_sample = queries[: min(200, len(queries))]
+    baseline_bytes = None
+    print(f"  {'encoding':<12} {'spec':<26} {'build s':>8} {'B/vector':>9} {'MB':>8} {'vs f32':>7} "
+          f"{'recall@k':>9} {'p50 ms':>8} {'p95 ms':>8}")
+    for label, quantization, pca_dim in variants:
+        spec = _spec_for(size, dim, quantization, pca_dim)
+        start = time.perf_counter()
+        index = make_index(corpus, spec)
+        build_secs = time.perf_counter() - start
+        apply_search_params(index)
+        nbytes = faiss.serialize_index(index).nbytes
+        baseline_bytes = baseline_bytes or nbytes
+
+        _, found = index.search(queries, args.k)
+        p50, p95 = latency_ms(index, latency_sample, args.k)
+        print(f"  {label:<12} {spec:<26} {build_secs:8.1f} {nbytes / size:9.0f} {nbytes / 2**20:8.1f} "
+              f"{nbytes / baseline_bytes:7.2f} {recall(found, truth, args.k):9.3f} {p50:8.3f} {p95:8.3f}")
+
+
+if __name__ == "__main__":
+    main()
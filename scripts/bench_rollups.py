@@ -0,0 +1,52 @@
+"""
+bench_rollups.py — latency of each aggregate query in tools/sql_tool
+answered by a full GROUP BY scan of subscribers versus the rollup tables.
+Run against a scaled database (see seed_db.py --rows):
+    python scripts/bench_rollups.py --db data/subscribers_20m.db [--iterations 20]
+Databases seeded before rollups existed can be upgraded first with:
+    python scripts/seed_db.py --refresh-rollups --db data/subscribers_20m.db
+"""
+import argparse
+import os
+import sqlite3
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import config
+from tools.sql_tool import _ROLLUP_QUERY_MAP, _SQL_QUERY_MAP
+
+
+def _median_ms(conn: sqlite3.Connection, sql: str, iterations: int) -> float:
+    timings = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        conn.execute(sql).fetchall()
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark aggregate queries: base table vs rollups.")
+    parser.add_argument("--db", default=config.DB_PATH)
+    parser.add_argument("--iterations", type=int, default=20)
+    args = parser.parse_args()
+
+    conn = sqlite3.connect(f"file:{os.path.abspath(args.db)}?mode=ro", uri=True)
+    rows = conn.execute("SELECT COUNT(*) FROM subscribers;").fetchone()[0]
+    print(f"Database: {args.db}  ({rows:,} subscribers, median of {args.iterations} runs)\n")
+    print(f"  {'keyword':<10} {'GROUP BY scan':>15} {'rollup':>12} {'speedup':>9}  same result")
+
+    for keyword, rollup_sql in _ROLLUP_QUERY_MAP.items():
+        base_sql = _SQL_QUERY_MAP[keyword]
+        same = sorted(conn.execute(base_sql).fetchall()) == sorted(conn.execute(rollup_sql).fetchall())
+        base = _median_ms(conn, base_sql, args.iterations)
+        rollup = _median_ms(conn, rollup_sql, args.iterations)
+        print(f"  {keyword:<10} {base:12.3f} ms {rollup:9.3f} ms {base / max(rollup, 1e-9):8.0f}x  {same}")
+
+    conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+bench_sql_pool.py — per-query latency of the pooled read-only connections
+versus opening a new sqlite3 connection for every call (the old behaviour).
+Every canned query in tools/sql_tool._SQL_QUERY_MAP is timed both ways.
+Run from the project root (optionally against a larger seeded database):
+    python scripts/bench_sql_pool.py [--iterations 200] [--db path/to.db]
+"""
+import argparse
+import os
+import sqlite3
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import config
+from tools.db_pool import ConnectionPool
+from tools.sql_tool import _SQL_QUERY_MAP
+
+
+def _time_calls(fn, iterations: int) -> list[float]:
+    timings = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def _summary(timings: list[float]) -> str:
+    ordered = sorted(timings)
+    p95 = ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))]
+    return f"p50 {statistics.median(ordered):8.3f} ms  p95 {p95:8.3f} ms"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark pooled vs per-call SQLite connections.")
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--db", default=config.DB_PATH)
+    args = parser.parse_args()
+
+    pool = ConnectionPool(args.db, size=1)
+    queries = {}
+    for keyword, sql in _SQL_QUERY_MAP.items():
+        queries.setdefault(sql.format(n=10) if "{n}" in sql else sql, keyword)
+
+    print(f"Database: {args.db}  ({args.iterations} iterations per query)\n")
+    for sql, keyword in queries.items():
+        def per_call():
+            conn = sqlite3.connect(args.db)
+            conn.execute(sql).fetchall()
+            conn.close()
+
+        def pooled():
+            with pool.connection() as conn:
+                conn.execute(sql).fetchall()
+
+        pooled()  # open the pooled connection outside the timed loop
+        base = _time_calls(per_call, args.iterations)
+        pool_t = _time_calls(pooled, args.iterations)
+        speedup = statistics.median(base) / max(statistics.median(pool_t), 1e-9)
+        print(f"[{keyword}]")
+        print(f"  connect-per-call  {_summary(base)}")
+        print(f"  pooled            {_summary(pool_t)}   ({speedup:.1f}x)")
+
+    pool.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""
+bench_vectors.py — synthetic corpora and measurements shared by the vector
+index benchmarks (bench_ann.py, bench_quantization.py). Not a benchmark
+itself; the scripts import it from this directory.
+"""
+import statistics
+import time
+
+import numpy as np
+
+
+def synthetic_corpus(size: int, dim: int, queries: int, seed: int = 42, spectrum: bool = False):
+    """
+    Unit-norm clustered vectors (about 100 per cluster) and `queries` noisy
+    copies of corpus vectors to search for.
+
+    With spectrum, dimensions are scaled by a decaying spectrum and rotated,
+    like sentence embeddings, which is what PCA and SQ8 are sensitive to;
+    query noise is then scaled by 1/sqrt(dim) to stay small against it.
+    """
+    rng = np.random.default_rng(seed)
+    scale = np.ones(dim, dtype=np.float32)
+    rotation = None
+    if spectrum:
+        scale = (1 + np.arange(dim, dtype=np.float32)) ** -0.5
+        rotation, _ = np.linalg.qr(rng.standard_normal((dim, dim)))
+    centers = rng.standard_normal((max(size // 100, 1), dim)).astype(np.float32) * scale
+    corpus = centers[rng.integers(0, len(centers), size)]
+    corpus += 0.35 * scale * rng.standard_normal((size, dim)).astype(np.float32)
+    if rotation is not None:
+        corpus = (corpus @ rotation).astype(np.float32)
+    corpus /= np.linalg.norm(corpus, axis=1, keepdims=True)
+    probe = corpus[rng.choice(size, queries, replace=False)]
+    noise = 0.1 / np.sqrt(dim) if spectrum else 0.1
+    probe = probe + noise * rng.standard_normal(probe.shape).astype(np.float32)
+    probe /= np.linalg.norm(probe, axis=1, keepdims=True)
+    return corpus, probe.astype(np.float32)
+
+
+def recall(found, truth, k: int) -> float:
+    """Mean fraction of the true top-k found in each result's top-k."""
+    return float(np.mean([len(set(f[:k]) & set(t[:k])) / k for f, t in zip(found, truth)]))
+
+
+def latency_ms(index, queries, k: int) -> tuple[float, float]:
+    """(p50, p95) single-query search latency in milliseconds."""
+    timings = []
+    for q in queries:
+        start = time.perf_counter()
+        index.search(q[None, :], k)
+        timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+    return statistics.median(timings), timings[int(0.95 * (len(timings) - 1))]
@@ -0,0 +1,39 @@
+"""
+build_index.py — pre-build the cached FAISS index for the knowledge base.
+The cache is keyed by a hash of the knowledge file and the embedding model,
+so the app loads it on startup instead of re-embedding every document.
+Run after editing data/telecom_knowledge.json (the Docker build runs it too):
+    python scripts/build_index.py [--force]
+A running API server picks up the new entry on SIGHUP (kill -HUP <pid>).
+"""
+import argparse
+import os
+import sys
+import time
+
+os.environ["TOKENIZERS_PARALLELISM"] = "false"
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import config
+from rag.vector_store import knowledge_fingerprint, load_index
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pre-build the FAISS index cache.")
+    parser.add_argument("--force", action="store_true", help="Rebuild even if the cache is current.")
+    args = parser.parse_args()
+
+    fingerprint = knowledge_fingerprint()
+    print(f"Knowledge base: {config.KNOWLEDGE_PATH}")
+    print(f"Fingerprint:    {fingerprint}")
+
+    start = time.perf_counter()
+    index = load_index(rebuild=args.force)
+    elapsed = time.perf_counter() - start
+
+    print(f"Index ready: {index.index.ntotal} vectors in {elapsed:.2f}s")
+    print(f"Cache dir:   {os.path.join(config.INDEX_CACHE_DIR, fingerprint)}")
+
+
+if __name__ == "__main__":
+    main()
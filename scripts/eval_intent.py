@@ -0,0 +1,66 @@
+"""
+eval_intent.py — accuracy/latency report for the local intent classifier.
+Classifies the routing cases from tests/test_pipeline.py with the embedding
+classifier alone (no rule-based shortcut, no Gemini) and reports which
+queries would still fall back to Gemini under INTENT_CONFIDENCE_MARGIN.
+Run from the project root:
+    python scripts/eval_intent.py
+"""
+import ast
+import os
+import statistics
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+import config
+from tools.intent_classifier import get_classifier
+
+
+def load_routing_cases() -> list[tuple[str, str]]:
+    # Read the list literal instead of importing the test module, which runs
+    # the whole live pipeline at import time.
+    path = os.path.join(ROOT, "tests", "test_pipeline.py")
+    with open(path, "r", encoding="utf-8") as f:
+        tree = ast.parse(f.read())
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Assign) and any(
+            isinstance(t, ast.Name) and t.id == "routing_cases" for t in node.targets
+        ):
+            return ast.literal_eval(node.value)
+    raise RuntimeError("routing_cases not found in tests/test_pipeline.py")
+
+
+def main():
+    cases = load_routing_cases()
+
+    start = time.perf_counter()
+    classifier = get_classifier()
+    load_ms = (time.perf_counter() - start) * 1000
+    print(f"Classifier ready in {load_ms:.0f} ms (model load + example embedding)\n")
+
+    latencies, correct, fallbacks = [], 0, 0
+    for query, expected in cases:
+        start = time.perf_counter()
+        label, margin = classifier.classify(query)
+        elapsed = (time.perf_counter() - start) * 1000
+        latencies.append(elapsed)
+
+        confident = margin >= config.INTENT_CONFIDENCE_MARGIN
+        correct += label == expected
+        fallbacks += not confident
+        mark = "[PASS]" if label == expected else "[FAIL]"
+        note = "" if confident else "  -> Gemini fallback"
+        print(f"  {mark}  [{label}] exp={expected}  margin={margin:.3f}  {elapsed:6.1f} ms  |  {query}{note}")
+
+    latencies.sort()
+    p95 = latencies[min(len(latencies) - 1, int(0.95 * len(latencies)))]
+    print()
+    print(f"Accuracy:       {correct}/{len(cases)} ({correct / len(cases):.0%})")
+    print(f"Gemini fallback: {fallbacks}/{len(cases)} below margin {config.INTENT_CONFIDENCE_MARGIN}")
+    print(f"Latency:        p50 {statistics.median(latencies):.1f} ms  p95 {p95:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+profile_imports.py — cold-start import cost per module (python -X importtime).
+Each profile runs in a fresh interpreter:
+  cold start  importing the app's entry modules; must fit IMPORT_BUDGET_MS
+  sql path    routing and answering a SQL question; must not load the
+              embedding stack (fastembed, onnxruntime, faiss, LangChain)
+  rag path    retrieving snippets for a strategy question; must not load pandas
+Exits 1 when the budget is exceeded or a path imports a module it must not.
+Run from the project root:
+    python scripts/profile_imports.py [--budget-ms 150] [--top 15] [--skip-rag]
+"""
+import argparse
+import os
+import subprocess
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import config
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_EMBEDDING_STACK = ("fastembed", "onnxruntime", "faiss", "langchain_core", "langchain_community")
+
+PROFILES = {
+    "cold start": (
+        "import pipeline, telemetry, rag.retriever, llm.gemini_client, llm.response_cache",
+        _EMBEDDING_STACK + ("pandas", "numpy", "google.genai", "httpx"),
+    ),
+    "sql path": (
+        "import pipeline; pipeline.prepare('List top 3 highest churn probability subscribers.')",
+        _EMBEDDING_STACK,
+    ),
+    "rag path": (
+        "from rag.retriever import retrieve_snippets; retrieve_snippets('What strategies reduce churn?')",
+        ("pandas",),
+    ),
+}
+
+
+def profile(code: str) -> list[tuple[int, int, int, str]]:
+    """(self us, cumulative us, depth, module) for every import the code triggers."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=ROOT, capture_output=True, text=True,
+        env={**os.environ, "TELEMETRY_ENABLED": "0"},
+    )
+    entries = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        entries.append((int(self_us), int(cumulative_us), depth, name.strip()))
+    if proc.returncode != 0:
+        tail = [line for line in proc.stderr.splitlines() if not line.startswith("import time:")]
+        raise RuntimeError("\n".join(tail[-5:]) or f"exit status {proc.returncode}")
+    return entries
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Profile module import time and check lazy-import rules.")
+    parser.add_argument("--budget-ms", type=float, default=config.IMPORT_BUDGET_MS)
+    parser.add_argument("--top", type=int, default=15, help="Slowest modules to list per profile.")
+    parser.add_argument("--skip-rag", action="store_true",
+                        help="Skip the RAG path (it loads the model and index).")
+    args = parser.parse_args()
+
+    # Modules the bare interpreter already loads (site, encodings, .pth hooks).
+    startup = {module for _, _, _, module in profile("pass")}
+
+    failed = False
+    for name, (code, forbidden) in PROFILES.items():
+        if name == "rag path" and args.skip_rag:
+            continue
+        try:
+            entries = [entry for entry in profile(code) if entry[3] not in startup]
+        except RuntimeError as exc:
+            print(f"\n[{name}] could not run:\n{exc}")
+            failed = True
+            continue
+
+        total_ms = sum(cumulative for _, cumulative, depth, _ in entries if depth == 0) / 1000
+        loaded = {module for _, _, _, module in entries}
+        violations = sorted(
+            module for module in loaded
+            if any(module == f or module.startswith(f + ".") for f in forbidden)
+        )
+
+        print(f"\n[{name}] {len(entries)} modules imported, {total_ms:.1f} ms total")
+        print(f"  {'cumulative ms':>14} {'self ms':>9}  module")
+        for self_us, cumulative_us, depth, module in sorted(entries, key=lambda e: -e[1])[:args.top]:
+            print(f"  {cumulative_us / 1000:14.1f} {self_us / 1000:9.1f}  {module}")
+
+        if violations:
+            failed = True
+            roots = sorted({f for f in forbidden for module in violations
+                            if module == f or module.startswith(f + ".")})
+            print(f"  FAIL: imports {', '.join(roots)}")
+        if name == "cold start":
+            verdict = "ok" if total_ms <= args.budget_ms else "FAIL"
+            failed = failed or total_ms > args.budget_ms
+            print(f"  budget: {total_ms:.1f} ms of {args.budget_ms:.0f} ms — {verdict}")
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -4,15 +4,22 @@ with 80 synthetic subscriber rows across four churn segments.
 
 Run from the project root:
     python scripts/seed_db.py
+
+For benchmarking at production scale, --rows N generates N rows with the
+same per-segment distributions (vectorised with NumPy, batched inserts):
+    python scripts/seed_db.py --rows 20000000 --db data/subscribers_20m.db
 """
+import argparse
 import sys
 import os
 import sqlite3
 import random
+import time
 
 # Allow running from any working directory
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 import config
+from tools.rollups import refresh_rollups
 
 random.seed(42)
 
@@ -48,24 +55,37 @@ SEGMENTS = {
 }
 
 
-def seed():
-    db_path = config.DB_PATH
+_CREATE_TABLE = """
+    CREATE TABLE subscribers (
+        subscriber_id    INTEGER PRIMARY KEY,
+        segment_label    TEXT    NOT NULL,
+        churn_probability REAL   NOT NULL,
+        monthly_charges  REAL    NOT NULL,
+        contract_type    TEXT    NOT NULL,
+        tenure           INTEGER NOT NULL
+    );
+"""
+
+_CREATE_INDEXES = (
+    "CREATE INDEX IF NOT EXISTS idx_subscribers_churn ON subscribers (churn_probability);",
+    "CREATE INDEX IF NOT EXISTS idx_subscribers_segment ON subscribers (segment_label);",
+    "CREATE INDEX IF NOT EXISTS idx_subscribers_contract ON subscribers (contract_type);",
+)
+
+
+def _create_indexes(cur):
+    for statement in _CREATE_INDEXES:
+        cur.execute(statement)
+
+
+def seed(db_path=config.DB_PATH):
     os.makedirs(os.path.dirname(db_path), exist_ok=True)
 
     conn = sqlite3.connect(db_path)
     cur = conn.cursor()
 
     cur.execute("DROP TABLE IF EXISTS subscribers;")
-    cur.execute("""
-        CREATE TABLE subscribers (
-            subscriber_id    INTEGER PRIMARY KEY,
-            segment_label    TEXT    NOT NULL,
-            churn_probability REAL   NOT NULL,
-            monthly_charges  REAL    NOT NULL,
-            contract_type    TEXT    NOT NULL,
-            tenure           INTEGER NOT NULL
-        );
-    """)
+    cur.execute(_CREATE_TABLE)
 
     rows = []
     subscriber_id = 1001
@@ -83,11 +103,100 @@ def seed():
         "INSERT INTO subscribers VALUES (?, ?, ?, ?, ?, ?);",
         rows,
     )
+    _create_indexes(cur)
     conn.commit()
+    refresh_rollups(conn)
     conn.close()
 
     print(f"Database seeded: {len(rows)} rows written to {db_path}")
 
 
+def _segment_batches(total_rows, batch_size, rng):
+    """Yield row tuples per batch, split across segments in SEGMENTS proportions."""
+    import numpy as np
+
+    weights = np.array([cfg["count"] for cfg in SEGMENTS.values()], dtype=np.float64)
+    counts = np.floor(total_rows * weights / weights.sum()).astype(np.int64)
+    counts[-1] += total_rows - counts.sum()
+
+    next_id = 1001
+    for (segment, cfg), segment_rows in zip(SEGMENTS.items(), counts):
+        contracts = np.array(cfg["contracts"])
+        for offset in range(0, int(segment_rows), batch_size):
+            size = min(batch_size, int(segment_rows) - offset)
+            ids = np.arange(next_id, next_id + size)
+            churn = np.round(rng.uniform(*cfg["churn_range"], size), 4)
+            monthly = np.round(rng.uniform(*cfg["charge_range"], size), 2)
+            tenure = rng.integers(cfg["tenure_range"][0], cfg["tenure_range"][1] + 1, size)
+            contract = contracts[rng.integers(0, len(contracts), size)]
+            next_id += size
+            yield zip(
+                ids.tolist(), [segment] * size, churn.tolist(),
+                monthly.tolist(), contract.tolist(), tenure.tolist(),
+            )
+
+
+def seed_scaled(total_rows, db_path=config.DB_PATH, batch_size=500_000):
+    import numpy as np
+
+    os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+    rng = np.random.default_rng(42)
+
+    conn = sqlite3.connect(db_path, isolation_level=None)
+    cur = conn.cursor()
+    # Bulk-load settings: no rollback journal or fsyncs while loading.
+    cur.execute("PRAGMA journal_mode = OFF;")
+    cur.execute("PRAGMA synchronous = OFF;")
+    cur.execute("PRAGMA cache_size = -262144;")
+    cur.execute("PRAGMA temp_store = MEMORY;")
+
+    cur.execute("DROP TABLE IF EXISTS subscribers;")
+    cur.execute(_CREATE_TABLE)
+
+    start = time.perf_counter()
+    for batch in _segment_batches(total_rows, batch_size, rng):
+        cur.execute("BEGIN;")
+        cur.executemany("INSERT INTO subscribers VALUES (?, ?, ?, ?, ?, ?);", batch)
+        cur.execute("COMMIT;")
+    load_secs = time.perf_counter() - start
+
+    start = time.perf_counter()
+    cur.execute("BEGIN;")
+    _create_indexes(cur)
+    cur.execute("COMMIT;")
+    index_secs = time.perf_counter() - start
+
+    # Rollups are filled in one pass after the load; the triggers installed
+    # here only maintain them for later incremental changes.
+    start = time.perf_counter()
+    refresh_rollups(conn)
+    rollup_secs = time.perf_counter() - start
+
+    cur.execute("PRAGMA journal_mode = DELETE;")
+    cur.execute("PRAGMA synchronous = FULL;")
+    cur.execute("ANALYZE;")
+    conn.close()
+
+    print(f"Database seeded: {total_rows} rows written to {db_path}")
+    print(f"  load:    {load_secs:.2f}s ({total_rows / max(load_secs, 1e-9):,.0f} rows/sec)")
+    print(f"  indexes: {index_secs:.2f}s")
+    print(f"  rollups: {rollup_secs:.2f}s")
+
+
 if __name__ == "__main__":
-    seed()
+    parser = argparse.ArgumentParser(description="Create and populate the subscribers database.")
+    parser.add_argument("--rows", type=int, help="Generate N rows with NumPy instead of the 80-row sample.")
+    parser.add_argument("--db", default=config.DB_PATH, help="Target database path.")
+    parser.add_argument("--batch-size", type=int, default=500_000)
+    parser.add_argument("--refresh-rollups", action="store_true",
+                        help="Only rebuild the rollup tables of an existing database.")
+    args = parser.parse_args()
+
+    if args.refresh_rollups:
+        with sqlite3.connect(args.db) as conn:
+            refresh_rollups(conn)
+        print(f"Rollup tables refreshed in {args.db}")
+    elif args.rows:
+        seed_scaled(args.rows, args.db, args.batch_size)
+    else:
+        seed(args.db)
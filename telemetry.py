@@ -0,0 +1,266 @@
+"""
+Timing spans and counters for the query pipeline, exported as JSON log
+lines and in Prometheus text format on a local /metrics endpoint.
+
+Everything is a no-op unless TELEMETRY_ENABLED is set: span() returns a
+shared do-nothing object and incr()/observe() return after one flag check.
+"""
+import functools
+import inspect
+import json
+import logging
+import sys
+import threading
+import time
+
+import config
+
+_LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Histogram buckets and help text for every metric the app records.
+_HISTOGRAMS = {
+    "span_duration_seconds": (_LATENCY_BUCKETS, "Duration of instrumented pipeline stages."),
+    "prompt_tokens": ((250, 500, 1000, 2000, 4000, 8000, 16000), "Estimated tokens per assembled prompt."),
+    "sql_rows": ((0, 1, 10, 50, 100, 200, 1000, 10000), "Rows returned by run_sql."),
+}
+_COUNTERS = {
+    "span_errors_total": "Instrumented stages that raised.",
+    "gemini_retries_total": "Gemini calls retried after a 429.",
+    "gemini_throttled_total": "Gemini 429 RESOURCE_EXHAUSTED responses.",
+    "gemini_deadline_exceeded_total": "Gemini calls abandoned at their deadline.",
+    "cache_requests_total": "Cache lookups by cache and result (hit/miss).",
+    "prompt_snippets_dropped_total": "Retrieved snippets dropped to fit the prompt budget.",
+}
+
+_enabled = config.TELEMETRY_ENABLED
+_lock = threading.Lock()
+_counters: dict[tuple[str, tuple], float] = {}
+_histograms: dict[tuple[str, tuple], list] = {}
+_logger = logging.getLogger("insight.telemetry")
+
+
+def _configure_logger() -> None:
+    if _logger.handlers:
+        return
+    if config.TELEMETRY_LOG_PATH:
+        handler = logging.FileHandler(config.TELEMETRY_LOG_PATH, encoding="utf-8")
+    else:
+        handler = logging.StreamHandler(sys.stderr)
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    _logger.addHandler(handler)
+    _logger.setLevel(logging.INFO)
+    _logger.propagate = False
+
+
+def enable(on: bool = True) -> None:
+    global _enabled
+    if on:
+        _configure_logger()
+    _enabled = on
+
+
+def enabled() -> bool:
+    return _enabled
+
+
+def _labels(labels: dict) -> tuple:
+    return tuple(sorted(labels.items()))
+
+
+def incr(name: str, value: float = 1, **labels) -> None:
+    if not _enabled:
+        return
+    key = (name, _labels(labels))
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + value
+
+
+def observe(name: str, value: float, **labels) -> None:
+    if not _enabled:
+        return
+    buckets = _HISTOGRAMS[name][0]
+    key = (name, _labels(labels))
+    with _lock:
+        state = _histograms.get(key)
+        if state is None:
+            state = _histograms[key] = [[0] * len(buckets), 0.0, 0]
+        for i, bound in enumerate(buckets):
+            if value <= bound:
+                state[0][i] += 1
+        state[1] += value
+        state[2] += 1
+
+
+def event(name: str, **fields) -> None:
+    """Write one structured log line."""
+    if not _enabled:
+        return
+    _logger.info(json.dumps({"ts": round(time.time(), 3), "event": name, **fields}, default=str))
+
+
+class _Span:
+    __slots__ = ("name", "attrs", "_start")
+
+    def __init__(self, name: str, attrs: dict):
+        self.name = name
+        self.attrs = attrs
+
+    def set(self, **attrs) -> None:
+        self.attrs.update(attrs)
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        seconds = time.perf_counter() - self._start
+        observe("span_duration_seconds", seconds, span=self.name)
+        if exc_type is not None:
+            incr("span_errors_total", span=self.name)
+        event(
+            "span",
+            span=self.name,
+            duration_ms=round(seconds * 1000, 3),
+            status="error" if exc_type else "ok",
+            thread=threading.current_thread().name,
+            **self.attrs,
+        )
+        return False
+
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def set(self, **attrs) -> None:
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+def span(name: str, **attrs):
+    """Time a block: `with telemetry.span("retrieve") as s: ...; s.set(k=3)`."""
+    if not _enabled:
+        return _NOOP_SPAN
+    return _Span(name, attrs)
+
+
+def traced(name: str):
+    """Decorator form of span() for plain and async functions."""
+    def decorate(fn):
+        if inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                if not _enabled:
+                    return await fn(*args, **kwargs)
+                with _Span(name, {}):
+                    return await fn(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return fn(*args, **kwargs)
+            with _Span(name, {}):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels: tuple, extra: tuple = ()) -> str:
+    items = labels + extra
+    if not items:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in items) + "}"
+
+
+def render_metrics() -> str:
+    """All counters and histograms in the Prometheus text exposition format."""
+    prefix = config.METRICS_PREFIX
+    with _lock:
+        counters = dict(_counters)
+        histograms = {key: (list(s[0]), s[1], s[2]) for key, s in _histograms.items()}
+
+    lines = []
+    for name, help_text in _COUNTERS.items():
+        series = sorted((labels, value) for (n, labels), value in counters.items() if n == name)
+        if not series:
+            continue
+        lines += [f"# HELP {prefix}{name} {help_text}", f"# TYPE {prefix}{name} counter"]
+        lines += [f"{prefix}{name}{_format_labels(labels)} {value:g}" for labels, value in series]
+
+    for name, (buckets, help_text) in _HISTOGRAMS.items():
+        series = sorted((labels, state) for (n, labels), state in histograms.items() if n == name)
+        if not series:
+            continue
+        lines += [f"# HELP {prefix}{name} {help_text}", f"# TYPE {prefix}{name} histogram"]
+        for labels, (counts, total, count) in series:
+            for bound, bucket_count in zip(buckets, counts):
+                lines.append(f"{prefix}{name}_bucket{_format_labels(labels, (('le', f'{bound:g}'),))} {bucket_count}")
+            lines.append(f"{prefix}{name}_bucket{_format_labels(labels, (('le', '+Inf'),))} {count}")
+            lines.append(f"{prefix}{name}_sum{_format_labels(labels)} {total:g}")
+            lines.append(f"{prefix}{name}_count{_format_labels(labels)} {count}")
+    return "\n".join(lines) + "\n"
+
+
+def _metrics_handler():
+    from http.server import BaseHTTPRequestHandler
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?", 1)[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = render_metrics().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    return MetricsHandler
+
+
+_server = None
+_server_lock = threading.Lock()
+
+
+def serve_metrics(host: str | None = None, port: int | None = None):
+    """
+    Start the /metrics endpoint on a daemon thread (once per process).
+    Does nothing when telemetry is disabled or METRICS_PORT is 0.
+    """
+    global _server
+    port = config.METRICS_PORT if port is None else port
+    if not _enabled or not port:
+        return None
+    with _server_lock:
+        if _server is None:
+            from http.server import ThreadingHTTPServer
+
+            try:
+                _server = ThreadingHTTPServer((host or config.METRICS_HOST, port), _metrics_handler())
+            except OSError as exc:
+                # Another process (e.g. a second Streamlit worker) owns the port.
+                event("metrics_server_unavailable", port=port, error=str(exc))
+                return None
+            _server.daemon_threads = True
+            threading.Thread(target=_server.serve_forever, name="metrics", daemon=True).start()
+    return _server
+
+
+if _enabled:
+    _configure_logger()
@@ -14,7 +14,7 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from tools.router import route
 from tools.sql_tool import run_sql, pick_sql_query, extract_limit
 from rag.retriever import retrieve
-from llm.prompt_template import build_prompt
+from llm.prompt_template import build_prompt, assemble_prompt
 from llm.gemini_client import generate
 
 P = "[PASS]"
@@ -77,10 +77,10 @@ top3_sql = (
     "FROM subscribers ORDER BY churn_probability DESC LIMIT 3;"
 )
 top3 = run_sql(top3_sql)
-data_lines = [l for l in top3.strip().splitlines()
-              if l.strip() and not all(c in "+-| " for c in l)]
-rows = len(data_lines) - 1  # subtract header
-sql_exec_ok = (rows == 3)
+rows = top3.row_count
+sql_exec_ok = top3.ok and (rows == 3) and top3.columns == (
+    "subscriber_id", "segment_label", "churn_probability"
+)
 print(f"  {P if sql_exec_ok else F}  Top-3 query -> {rows} rows (expected 3)")
 print(top3)
 
@@ -120,7 +120,7 @@ results["D. RAG retrieval"] = rag_ok
 
 # ── E. PROMPT STRUCTURE ──────────────────────────────────────────────────────
 print(f"\n{D}\nE. PROMPT STRUCTURE VALIDATION\n")
-sql_s = run_sql(top3_sql)
+sql_s = run_sql(top3_sql).to_text()
 ctx_s = retrieve("churn high risk")
 p     = build_prompt("List top 3 churners", ctx_s, sql_s)
 
@@ -142,6 +142,16 @@ sql_only_checks = {
     "SQL-only: no RAG context injected":   "No relevant documents found." in p_sql_only,
     "SQL-only: SQL results present":       "SQL Query Results" in p_sql_only,
 }
+# Token budget: oversized context is trimmed, lowest-ranked snippet first
+big_snippets = [ctx_s, "filler " * 4000, "filler " * 4000]
+built = assemble_prompt("List top 3 churners", big_snippets, run_sql(top3_sql), token_budget=2000)
+budget_checks = {
+    "Budget: estimated tokens within budget":  built.estimated_tokens <= 2000,
+    "Budget: top-ranked snippet kept":          built.snippets_used >= 1 and ctx_s in built.text,
+    "Budget: SQL rows encoded as CSV":          "subscriber_id,segment_label,churn_probability" in built.text,
+}
+prompt_checks.update(budget_checks)
+
 prompt_ok = True
 for lbl, passed in prompt_checks.items():
     print(f"  {P if passed else F}  {lbl}")
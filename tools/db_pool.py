@@ -0,0 +1,130 @@
+import os
+import pathlib
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+import config
+
+
+def file_identity(db_path: str) -> tuple[int, int, int, int]:
+    """(device, inode, mtime_ns, size) of the database file."""
+    st = os.stat(db_path)
+    return st.st_dev, st.st_ino, st.st_mtime_ns, st.st_size
+
+
+class ConnectionPool:
+    """
+    Thread-safe pool of read-only SQLite connections. Connections are opened
+    lazily up to `size`, tuned once with read-oriented pragmas, and handed
+    back out most-recently-used first so a worker thread usually gets a
+    connection whose page cache and statement cache are already warm.
+
+    If the database file is replaced (e.g. reseeded to a new inode), open
+    connections would keep reading the old file, so the pool drops them and
+    reconnects on the next borrow.
+    """
+
+    def __init__(self, db_path: str, size: int, timeout: float = 30.0):
+        self._db_path = db_path
+        self._uri = f"{pathlib.Path(db_path).resolve().as_uri()}?mode=ro"
+        self._size = size
+        self._timeout = timeout
+        self._idle: queue.LifoQueue[tuple[int, sqlite3.Connection]] = queue.LifoQueue()
+        self._created = 0
+        self._generation = 0
+        self._inode: tuple[int, int] | None = None
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(
+            self._uri,
+            uri=True,
+            check_same_thread=False,
+            cached_statements=256,
+        )
+        conn.execute(f"PRAGMA mmap_size = {int(config.SQLITE_MMAP_SIZE)};")
+        conn.execute(f"PRAGMA cache_size = -{int(config.SQLITE_CACHE_SIZE_KB)};")
+        conn.execute("PRAGMA temp_store = MEMORY;")
+        conn.execute("PRAGMA query_only = ON;")
+        return conn
+
+    def _check_replaced(self) -> None:
+        inode = file_identity(self._db_path)[:2]
+        with self._lock:
+            if self._inode is None:
+                self._inode = inode
+            elif inode != self._inode:
+                self._inode = inode
+                self._generation += 1
+                self._drain()
+
+    def _drain(self) -> None:
+        while True:
+            try:
+                _, conn = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            conn.close()
+            self._created -= 1
+
+    def _acquire(self) -> tuple[int, sqlite3.Connection]:
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            if self._created < self._size:
+                self._created += 1
+                generation = self._generation
+                create = True
+            else:
+                create = False
+        if create:
+            try:
+                return generation, self._connect()
+            except Exception:
+                with self._lock:
+                    self._created -= 1
+                raise
+        try:
+            return self._idle.get(timeout=self._timeout)
+        except queue.Empty:
+            raise TimeoutError("Timed out waiting for a pooled SQLite connection.") from None
+
+    def _release(self, generation: int, conn: sqlite3.Connection) -> None:
+        with self._lock:
+            stale = generation != self._generation
+            if stale:
+                self._created -= 1
+            else:
+                self._idle.put((generation, conn))
+        if stale:
+            conn.close()
+
+    @contextmanager
+    def connection(self):
+        self._check_replaced()
+        generation, conn = self._acquire()
+        try:
+            yield conn
+        finally:
+            self._release(generation, conn)
+
+    def close(self) -> None:
+        with self._lock:
+            self._generation += 1
+            self._drain()
+
+
+_pool: ConnectionPool | None = None
+_pool_lock = threading.Lock()
+
+
+def get_pool() -> ConnectionPool:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ConnectionPool(config.DB_PATH, size=config.SQL_POOL_SIZE)
+    return _pool
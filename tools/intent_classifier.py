@@ -0,0 +1,61 @@
+import json
+import threading
+
+import config
+
+
+class IntentClassifier:
+    """
+    Nearest-centroid classifier over labelled example queries, embedded with
+    the same fastembed model the RAG path uses. classify() returns the label
+    together with a margin: the gap in cosine similarity between the best and
+    the runner-up centroid, which callers use as a confidence score.
+    """
+
+    def __init__(self, examples: list[dict], embeddings):
+        import numpy as np
+        from rag.vector_store import embed_matrix
+
+        self._embeddings = embeddings
+        vectors = self._normalize(embed_matrix(embeddings, [e["query"] for e in examples]))
+        labels = [e["label"] for e in examples]
+        self.labels = sorted(set(labels))
+        self._centroids = self._normalize(np.stack([
+            vectors[[i for i, label in enumerate(labels) if label == target]].mean(axis=0)
+            for target in self.labels
+        ]))
+
+    @staticmethod
+    def _normalize(matrix):
+        import numpy as np
+
+        norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+        return matrix / np.where(norms == 0, 1, norms)
+
+    def classify(self, query: str) -> tuple[str, float]:
+        import numpy as np
+        from rag.vector_store import embed_vector
+
+        vec = self._normalize(embed_vector(self._embeddings, query))
+        scores = self._centroids @ vec
+        order = np.argsort(scores)[::-1]
+        margin = float(scores[order[0]] - scores[order[1]]) if len(order) > 1 else 1.0
+        return self.labels[order[0]], margin
+
+
+_classifier: IntentClassifier | None = None
+_classifier_lock = threading.Lock()
+
+
+def load_examples(path: str = config.INTENT_EXAMPLES_PATH) -> list[dict]:
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def get_classifier() -> IntentClassifier:
+    global _classifier
+    with _classifier_lock:
+        if _classifier is None:
+            from rag.vector_store import get_embeddings
+            _classifier = IntentClassifier(load_examples(), get_embeddings())
+    return _classifier
@@ -0,0 +1,138 @@
+"""
+Materialized per-segment and per-contract rollups of the subscribers table.
+
+The loader fills them with refresh_rollups() after a bulk load and then
+installs triggers so later inserts, updates, deletes and INSERT OR REPLACE
+upserts keep them current.
+tools.sql_tool answers its canned aggregate queries from them when they exist.
+"""
+import sqlite3
+import threading
+
+from tools.db_pool import file_identity
+
+_DIMENSIONS = {
+    "segment_rollup": "segment_label",
+    "contract_rollup": "contract_type",
+}
+
+# The row an INSERT OR REPLACE is about to overwrite. SQLite only fires the
+# delete trigger for rows removed by REPLACE when recursive_triggers is on,
+# so the insert trigger subtracts the replaced row from here instead.
+_REPLACED_TABLE = "rollup_replaced_row"
+
+
+def _schema_sql() -> str:
+    return f"""
+        CREATE TABLE IF NOT EXISTS {_REPLACED_TABLE} (
+            subscriber_id      INTEGER PRIMARY KEY,
+            segment_label      TEXT,
+            contract_type      TEXT,
+            churn_probability  REAL,
+            monthly_charges    REAL
+        );""" + "".join(
+        f"""
+        CREATE TABLE IF NOT EXISTS {table} (
+            {column}             TEXT    PRIMARY KEY,
+            subscriber_count     INTEGER NOT NULL,
+            churn_sum            REAL    NOT NULL,
+            monthly_charges_sum  REAL    NOT NULL
+        );"""
+        for table, column in _DIMENSIONS.items()
+    )
+
+
+def _add_row(table: str, column: str, ref: str) -> str:
+    return f"""
+        INSERT INTO {table} VALUES ({ref}.{column}, 1, {ref}.churn_probability, {ref}.monthly_charges)
+        ON CONFLICT({column}) DO UPDATE SET
+            subscriber_count = subscriber_count + 1,
+            churn_sum = churn_sum + excluded.churn_sum,
+            monthly_charges_sum = monthly_charges_sum + excluded.monthly_charges_sum;"""
+
+
+def _remove_row(table: str, column: str, ref: str) -> str:
+    return _remove_values(table, column, lambda name: f"{ref}.{name}")
+
+
+def _remove_replaced(table: str, column: str) -> str:
+    return _remove_values(
+        table, column,
+        lambda name: f"(SELECT {name} FROM {_REPLACED_TABLE} WHERE subscriber_id = NEW.subscriber_id)",
+    )
+
+
+def _remove_values(table: str, column: str, value) -> str:
+    return f"""
+        UPDATE {table} SET
+            subscriber_count = subscriber_count - 1,
+            churn_sum = churn_sum - {value("churn_probability")},
+            monthly_charges_sum = monthly_charges_sum - {value("monthly_charges")}
+        WHERE {column} = {value(column)};
+        DELETE FROM {table} WHERE {column} = {value(column)} AND subscriber_count <= 0;"""
+
+
+def _triggers_sql() -> str:
+    add_new = "".join(_add_row(t, c, "NEW") for t, c in _DIMENSIONS.items())
+    remove_old = "".join(_remove_row(t, c, "OLD") for t, c in _DIMENSIONS.items())
+    remove_replaced = "".join(_remove_replaced(t, c) for t, c in _DIMENSIONS.items())
+    # The BEFORE trigger records the row currently under NEW's id, if any;
+    # the AFTER trigger only fires once the insert succeeded, so a conflict
+    # that is ignored (OR IGNORE, DO NOTHING) never subtracts anything.
+    return f"""
+        DROP TRIGGER IF EXISTS subscribers_rollup_before_insert;
+        DROP TRIGGER IF EXISTS subscribers_rollup_insert;
+        DROP TRIGGER IF EXISTS subscribers_rollup_delete;
+        DROP TRIGGER IF EXISTS subscribers_rollup_update;
+        CREATE TRIGGER subscribers_rollup_before_insert BEFORE INSERT ON subscribers BEGIN
+            DELETE FROM {_REPLACED_TABLE} WHERE subscriber_id = NEW.subscriber_id;
+            INSERT INTO {_REPLACED_TABLE}
+            SELECT subscriber_id, segment_label, contract_type, churn_probability, monthly_charges
+            FROM subscribers WHERE subscriber_id = NEW.subscriber_id;
+        END;
+        CREATE TRIGGER subscribers_rollup_insert AFTER INSERT ON subscribers BEGIN{remove_replaced}{add_new}
+            DELETE FROM {_REPLACED_TABLE} WHERE subscriber_id = NEW.subscriber_id;
+        END;
+        CREATE TRIGGER subscribers_rollup_delete AFTER DELETE ON subscribers BEGIN{remove_old}
+        END;
+        CREATE TRIGGER subscribers_rollup_update
+        AFTER UPDATE OF segment_label, contract_type, churn_probability, monthly_charges
+        ON subscribers BEGIN{remove_old}{add_new}
+        END;
+    """
+
+
+def refresh_rollups(conn: sqlite3.Connection) -> None:
+    """Rebuild the rollup tables from scratch and (re)install the triggers."""
+    conn.executescript(_schema_sql())
+    conn.execute(f"DELETE FROM {_REPLACED_TABLE};")
+    for table, column in _DIMENSIONS.items():
+        conn.execute(f"DELETE FROM {table};")
+        conn.execute(
+            f"INSERT INTO {table} "
+            f"SELECT {column}, COUNT(*), SUM(churn_probability), SUM(monthly_charges) "
+            f"FROM subscribers GROUP BY {column};"
+        )
+    conn.executescript(_triggers_sql())
+    conn.commit()
+
+
+_available: tuple[tuple, bool] | None = None
+_available_lock = threading.Lock()
+
+
+def rollups_available(conn: sqlite3.Connection, db_path: str) -> bool:
+    """Whether the database has the rollup tables, cached per file identity."""
+    global _available
+    identity = file_identity(db_path)
+    with _available_lock:
+        if _available is not None and _available[0] == identity:
+            return _available[1]
+    found = conn.execute(
+        "SELECT COUNT(*) FROM sqlite_master WHERE type = 'table' AND name IN (?, ?);",
+        tuple(_DIMENSIONS),
+    ).fetchone()[0]
+    result = found == len(_DIMENSIONS)
+    with _available_lock:
+        _available = (identity, result)
+    return result
@@ -1,5 +1,6 @@
 import re
 import config
+import telemetry
 
 # Keywords that strongly indicate a structured data query
 _SQL_KEYWORDS = {
@@ -27,31 +28,120 @@ def _rule_based(query: str) -> str | None:
     return None
 
 
-def _llm_classify(query: str) -> str:
-    from google import genai
-    client = genai.Client(api_key=config.GEMINI_API_KEY)
-
-    classification_prompt = (
+def _classification_prompt(query: str) -> str:
+    return (
         "You are a query router for a telecom analytics assistant.\n"
         "Classify the following user query as either 'sql' (structured data lookup) "
         "or 'rag' (knowledge / strategy question).\n"
         "Respond with ONLY one word: sql or rag.\n\n"
         f"Query: {query}"
     )
+
+
+@telemetry.traced("llm_classify")
+def _llm_classify(query: str) -> str:
+    from google.genai import errors as genai_errors
+    from llm.client import get_client
+    from llm.rate_limiter import Retry
+
+    prompt = _classification_prompt(query)
+    retry = Retry(len(prompt) // 4 + 5, deadline_seconds=config.ROUTER_DEADLINE_SECONDS)
+    try:
+        while True:
+            retry.acquire()
+            try:
+                response = get_client().models.generate_content(
+                    model=config.GEMINI_MODEL,
+                    contents=prompt,
+                )
+                retry.succeeded()
+                break
+            except genai_errors.ClientError as exc:
+                if not retry.should_retry(exc):
+                    raise
+                retry.sleep()
+        label = response.text.strip().lower()
+        return "sql" if "sql" in label else "rag"
+    except Exception:
+        return "rag"
+
+
+@telemetry.traced("llm_classify")
+async def classify_async(query: str) -> str:
+    from google.genai import errors as genai_errors
+    from llm.client import get_client
+    from llm.rate_limiter import Retry
+
+    prompt = _classification_prompt(query)
+    retry = Retry(len(prompt) // 4 + 5, deadline_seconds=config.ROUTER_DEADLINE_SECONDS)
     try:
-        response = client.models.generate_content(
-            model=config.GEMINI_MODEL,
-            contents=classification_prompt,
-        )
+        while True:
+            await retry.acquire_async()
+            try:
+                response = await get_client().aio.models.generate_content(
+                    model=config.GEMINI_MODEL,
+                    contents=prompt,
+                )
+                retry.succeeded()
+                break
+            except genai_errors.ClientError as exc:
+                if not retry.should_retry(exc):
+                    raise
+                await retry.sleep_async()
         label = response.text.strip().lower()
         return "sql" if "sql" in label else "rag"
     except Exception:
         return "rag"
 
 
+def _local_classify(query: str) -> tuple[str | None, float]:
+    try:
+        from tools.intent_classifier import get_classifier
+        return get_classifier().classify(query)
+    except Exception:
+        return None, 0.0
+
+
+def route_by_rules(query: str) -> str | None:
+    """The keyword decision alone; None when the query is ambiguous."""
+    return _rule_based(query)
+
+
+def classify_locally(query: str) -> str | None:
+    """The local classifier's label if it clears INTENT_CONFIDENCE_MARGIN, else None."""
+    label, margin = _local_classify(query)
+    if label and margin >= config.INTENT_CONFIDENCE_MARGIN:
+        return label
+    return None
+
+
+def classify_with_llm(query: str) -> str:
+    """Ask Gemini; for queries neither the rules nor the local classifier decide."""
+    return _llm_classify(query)
+
+
+def classify(query: str) -> str:
+    """Decide an ambiguous query: local classifier first, Gemini if unsure."""
+    return classify_locally(query) or _llm_classify(query)
+
+
+@telemetry.traced("route")
 def route(query: str) -> str:
     decision = _rule_based(query)
     if decision:
         return decision
-    # Ambiguous — use LLM classification
-    return _llm_classify(query)
+    # Ambiguous — try the local embedding classifier, then the LLM
+    return classify(query)
+
+
+@telemetry.traced("route")
+async def route_async(query: str) -> str:
+    import asyncio
+
+    decision = _rule_based(query)
+    if decision:
+        return decision
+    label, margin = await asyncio.to_thread(_local_classify, query)
+    if label and margin >= config.INTENT_CONFIDENCE_MARGIN:
+        return label
+    return await classify_async(query)
@@ -0,0 +1,117 @@
+import re
+import sqlite3
+import threading
+from collections import OrderedDict
+
+import config
+from tools.db_pool import file_identity
+
+
+def normalize_sql(query: str) -> str:
+    return re.sub(r"\s+", " ", query).strip().rstrip(";").strip()
+
+
+class SqlResultCache:
+    """
+    LRU cache of SELECT results keyed by normalized SQL text.
+
+    Entries are only valid for one state of the database: the cache empties
+    itself when the file identity (device, inode, mtime, size) changes,
+    when `PRAGMA data_version` moves on any pooled connection, which happens
+    as soon as another connection commits a write (e.g. a reseed), or when a
+    connection it hasn't seen before is used. data_version values are only
+    comparable on one connection, so a new connection (after a pool drain,
+    say) gives no proof the cached results are still current.
+
+    Each invalidation bumps a generation. get() returns the generation it
+    validated and put() drops a result read under an older one, so a query
+    that was in flight during a reseed can't repopulate the cache.
+    """
+
+    def __init__(self, db_path: str, max_entries: int):
+        self._db_path = db_path
+        self._max_entries = max_entries
+        self._entries: OrderedDict[str, object] = OrderedDict()
+        self._identity: tuple | None = None
+        self._generation = 0
+        # id(conn) -> (conn, last data_version). Holding the connection keeps
+        # its id from being reused by a later one while it is tracked.
+        self._data_versions: dict[int, tuple[sqlite3.Connection, int]] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def _validate(self, conn: sqlite3.Connection) -> int:
+        identity = file_identity(self._db_path)
+        version = conn.execute("PRAGMA data_version;").fetchone()[0]
+        with self._lock:
+            tracked = self._data_versions.get(id(conn))
+            if identity != self._identity or tracked is None or tracked[1] != version:
+                if self._entries:
+                    self.invalidations += 1
+                self._entries.clear()
+                self._generation += 1
+                if identity != self._identity:
+                    self._data_versions.clear()
+                elif tracked is None:
+                    self._forget_closed()
+                self._identity = identity
+            self._data_versions[id(conn)] = (conn, version)
+            return self._generation
+
+    def _forget_closed(self) -> None:
+        for key, (tracked_conn, _) in list(self._data_versions.items()):
+            try:
+                tracked_conn.total_changes
+            except sqlite3.ProgrammingError:
+                del self._data_versions[key]
+
+    def get(self, conn: sqlite3.Connection, key: str) -> tuple[object | None, int]:
+        """(cached result or None, generation to pass to put())."""
+        generation = self._validate(conn)
+        with self._lock:
+            result = self._entries.get(key)
+            if result is None:
+                self.misses += 1
+                return None, generation
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return result, generation
+
+    def put(self, key: str, result, generation: int) -> None:
+        with self._lock:
+            if generation != self._generation:
+                return
+            self._entries[key] = result
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._generation += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "invalidations": self.invalidations,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+_cache: SqlResultCache | None = None
+_cache_lock = threading.Lock()
+
+
+def get_cache() -> SqlResultCache:
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = SqlResultCache(config.DB_PATH, max_entries=config.SQL_CACHE_MAX_ENTRIES)
+    return _cache
@@ -1,10 +1,136 @@
+import csv
+import io
 import re
-import sqlite3
-import pandas as pd
+import time
+from dataclasses import dataclass, field, replace
+from tools.db_pool import get_pool
+from tools import sql_cache
+from tools.rollups import rollups_available
 import config
+import telemetry
 
 _BLOCKED_KEYWORDS = ("insert", "update", "delete", "drop", "alter", "create", "replace")
 
+
+@dataclass(frozen=True)
+class SqlResult:
+    """
+    Rows as fetched from the cursor, with their column names and timing.
+    Prompt text and the UI table are both derived from this object, so the
+    result is never formatted to a string and parsed back.
+    """
+    columns: tuple[str, ...] = ()
+    rows: list[tuple] = field(default_factory=list)
+    elapsed_ms: float = 0.0
+    message: str = ""
+    from_cache: bool = False
+    # Rows the query asked for (its LIMIT) when the caps cut it short,
+    # otherwise the rows fetched. Rows past the caps are never read, so a
+    # result without a LIMIT has no known total.
+    total_rows: int = 0
+    truncated: bool = False
+
+    @property
+    def ok(self) -> bool:
+        return not self.message
+
+    @property
+    def row_count(self) -> int:
+        return len(self.rows)
+
+    @property
+    def truncation_note(self) -> str:
+        if not self.truncated:
+            return ""
+        if self.total_rows > self.row_count:
+            return f"(showing {self.row_count} of {self.total_rows} requested rows)"
+        return f"(showing the first {self.row_count} rows; the rest were not fetched)"
+
+    def _empty_text(self) -> str:
+        if self.truncated:
+            return (f"Query returned rows, but the first one exceeds SQL_MAX_BYTES "
+                    f"({config.SQL_MAX_BYTES} bytes); no rows were kept.")
+        return "Query executed successfully but returned no results."
+
+    def to_frame(self):
+        import pandas as pd
+        return pd.DataFrame.from_records(self.rows, columns=list(self.columns))
+
+    def to_text(self) -> str:
+        if self.message:
+            return self.message
+        if not self.rows:
+            return self._empty_text()
+
+        cells = [list(self.columns)] + [["" if v is None else str(v) for v in row] for row in self.rows]
+        widths = [max(len(row[i]) for row in cells) for i in range(len(self.columns))]
+        table = "\n".join(
+            "  ".join(value.rjust(width) for value, width in zip(row, widths))
+            for row in cells
+        )
+        return f"{table}\n{self.truncation_note}" if self.truncated else table
+
+    def to_csv(self, max_rows: int | None = None) -> str:
+        """Compact CSV encoding (no padding) for prompts."""
+        if self.message:
+            return self.message
+        if not self.rows:
+            return self._empty_text()
+
+        buf = io.StringIO()
+        writer = csv.writer(buf, lineterminator="\n")
+        writer.writerow(self.columns)
+        if max_rows is not None:
+            writer.writerows(self.rows[:max_rows])
+        else:
+            writer.writerows(self.rows)
+            if self.truncated:
+                buf.write(self.truncation_note + "\n")
+        return buf.getvalue().rstrip("\n")
+
+    def column_summary(self) -> list[str]:
+        """One line per column: numeric min/max/mean, or distinct-value count."""
+        lines = []
+        for i, name in enumerate(self.columns):
+            values = [row[i] for row in self.rows if row[i] is not None]
+            numeric = [v for v in values if isinstance(v, (int, float))]
+            if values and len(numeric) == len(values):
+                lines.append(
+                    f"{name}: min={min(numeric)}, max={max(numeric)}, "
+                    f"mean={round(sum(numeric) / len(numeric), 4)}"
+                )
+            else:
+                lines.append(f"{name}: {len(set(values))} distinct values")
+        return lines
+
+    def to_dict(self) -> dict:
+        """JSON-ready form, as served by the HTTP API."""
+        return {
+            "columns": list(self.columns),
+            "rows": [list(row) for row in self.rows],
+            "elapsed_ms": self.elapsed_ms,
+            "message": self.message,
+            "from_cache": self.from_cache,
+            "total_rows": self.total_rows,
+            "truncated": self.truncated,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "SqlResult":
+        return cls(
+            columns=tuple(data.get("columns", ())),
+            rows=[tuple(row) for row in data.get("rows", ())],
+            elapsed_ms=data.get("elapsed_ms", 0.0),
+            message=data.get("message", ""),
+            from_cache=data.get("from_cache", False),
+            total_rows=data.get("total_rows", 0),
+            truncated=data.get("truncated", data.get("total_rows", 0) > len(data.get("rows", ()))),
+        )
+
+    def __str__(self) -> str:
+        return self.to_text()
+
+
 _SQL_QUERY_MAP = {
     "average": "SELECT segment_label, ROUND(AVG(churn_probability), 4) AS avg_churn_prob FROM subscribers GROUP BY segment_label ORDER BY avg_churn_prob DESC;",
     "top":     "SELECT subscriber_id, segment_label, churn_probability, monthly_charges, contract_type FROM subscribers ORDER BY churn_probability DESC LIMIT {n};",
@@ -18,6 +144,21 @@ _SQL_QUERY_MAP = {
     "sum":     "SELECT segment_label, ROUND(SUM(monthly_charges), 2) AS total_monthly_revenue FROM subscribers GROUP BY segment_label ORDER BY total_monthly_revenue DESC;",
 }
 
+# Same results as the aggregate entries above, read from the rollup tables
+# maintained by tools.rollups instead of scanning subscribers.
+_ROLLUP_QUERY_MAP = {
+    "average": "SELECT segment_label, ROUND(churn_sum / subscriber_count, 4) AS avg_churn_prob FROM segment_rollup ORDER BY avg_churn_prob DESC;",
+    "count":   "SELECT contract_type, subscriber_count FROM contract_rollup ORDER BY subscriber_count DESC;",
+    "how many":"SELECT contract_type, subscriber_count FROM contract_rollup ORDER BY subscriber_count DESC;",
+    "total":   "SELECT segment_label, subscriber_count AS total_subscribers FROM segment_rollup ORDER BY total_subscribers DESC;",
+    "sum":     "SELECT segment_label, ROUND(monthly_charges_sum, 2) AS total_monthly_revenue FROM segment_rollup ORDER BY total_monthly_revenue DESC;",
+}
+
+_ROLLUP_REWRITES = {
+    sql_cache.normalize_sql(_SQL_QUERY_MAP[keyword]): rollup_sql
+    for keyword, rollup_sql in _ROLLUP_QUERY_MAP.items()
+}
+
 
 def extract_limit(query: str, default: int = 10) -> int:
     match = re.search(r"\b(?:top|list|show|lowest|highest)\s+(\d+)\b", query.lower())
@@ -48,19 +189,86 @@ def _is_safe(query: str) -> bool:
     return True
 
 
-def run_sql(query: str) -> str:
-    if not _is_safe(query):
-        return "Query blocked: only SELECT statements are permitted."
+_LIMIT_RE = re.compile(r"\blimit\s+(\d+)\s*;?\s*$", re.IGNORECASE)
 
-    try:
-        conn = sqlite3.connect(config.DB_PATH)
-        df = pd.read_sql_query(query, conn)
-        conn.close()
 
-        if df.empty:
-            return "Query executed successfully but returned no results."
+def _clamp_limit(query: str) -> tuple[str, int | None]:
+    """
+    Lower a trailing LIMIT above SQL_MAX_ROWS to SQL_MAX_ROWS + 1 (one extra
+    row shows the cap was hit), so SQLite never produces rows that would be
+    dropped. Returns the query to run and the LIMIT it asked for, if any.
+    """
+    match = _LIMIT_RE.search(query)
+    if not match:
+        return query, None
+    requested = int(match.group(1))
+    if requested > config.SQL_MAX_ROWS:
+        query = f"{query[:match.start(1)]}{config.SQL_MAX_ROWS + 1}{query[match.end(1):]}"
+    return query, requested
+
 
-        return df.to_string(index=False)
+def _fetch_bounded(cursor) -> tuple[list[tuple], bool]:
+    """
+    Stream rows from the cursor in chunks, keeping at most SQL_MAX_ROWS rows
+    and roughly SQL_MAX_BYTES of cell text. Fetching stops at the first row
+    past either cap, so the cost stays bounded however large the result is.
+    Returns the rows and whether the caps cut the result short.
+    """
+    rows: list[tuple] = []
+    budget = config.SQL_MAX_BYTES
+    while True:
+        chunk = cursor.fetchmany(config.SQL_FETCH_SIZE)
+        if not chunk:
+            return rows, False
+        for row in chunk:
+            size = sum(len(str(v)) for v in row) + len(row)
+            if len(rows) >= config.SQL_MAX_ROWS or size > budget:
+                return rows, True
+            budget -= size
+            rows.append(row)
 
+
+@telemetry.traced("run_sql")
+def run_sql(query: str) -> SqlResult:
+    if not _is_safe(query):
+        return SqlResult(message="Query blocked: only SELECT statements are permitted.")
+
+    start = time.perf_counter()
+    key = sql_cache.normalize_sql(query)
+    try:
+        with get_pool().connection() as conn:
+            if config.SQL_CACHE_ENABLED:
+                cached, generation = sql_cache.get_cache().get(conn, key)
+                telemetry.incr("cache_requests_total", cache="sql", result="miss" if cached is None else "hit")
+                if cached is not None:
+                    telemetry.observe("sql_rows", cached.row_count)
+                    return replace(
+                        cached, elapsed_ms=(time.perf_counter() - start) * 1000, from_cache=True
+                    )
+            rollup_sql = _ROLLUP_REWRITES.get(key)
+            if rollup_sql and rollups_available(conn, config.DB_PATH):
+                query = rollup_sql
+            query, requested = _clamp_limit(query)
+            cursor = conn.execute(query)
+            try:
+                columns = tuple(col[0] for col in cursor.description or ())
+                rows, truncated = _fetch_bounded(cursor)
+            finally:
+                cursor.close()  # resets an undrained statement before the connection goes back
     except Exception as exc:
-        return f"SQL execution error: {exc}"
+        return SqlResult(
+            elapsed_ms=(time.perf_counter() - start) * 1000,
+            message=f"SQL execution error: {exc}",
+        )
+
+    result = SqlResult(
+        columns=columns,
+        rows=rows,
+        elapsed_ms=(time.perf_counter() - start) * 1000,
+        total_rows=max(requested or 0, len(rows)) if truncated else len(rows),
+        truncated=truncated,
+    )
+    telemetry.observe("sql_rows", result.row_count)
+    if config.SQL_CACHE_ENABLED:
+        sql_cache.get_cache().put(key, result, generation)
+    return result